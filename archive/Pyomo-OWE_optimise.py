@@ -33,14 +33,35 @@ connection feasibility, capacity limitations, and distance constraints.
     - max_oss_ss_dist (float): Maximum allowed distance from offshore substations to onshore substations.
     - universal_offshore_ss_max_capacity (float): Maximum capacity for any offshore substation.
     
-The optimization model is solved using Pyomo with GLPK as the solver. The solution includes selected
+The offshore substation and export cable costs are constants evaluated once before the model is built.
+Each offshore substation and its export cables are sized for the combined capacity of all wind farms
+within reach of the substation, not for the capacity actually connected in the solution. This
+overestimates the costs of substations that end up serving only some of the wind farms in reach,
+which biases the selection towards substations with fewer wind farms in reach.
+
+The optimization model is solved using Pyomo with HiGHS as the solver. The solution includes selected
 wind farms, offshore substations, and connections between them, adhering to defined constraints.
 """
 
 import math
 from pyomo.environ import *
 import numpy as np
+from numba import njit
+from scripts.iac_cost import iac_cost_ceil
+
+# Define years for installation, operational, and decommissioning
+inst_year = 0  # First year
+ope_year = inst_year + 5
+dec_year = ope_year + 25  
+end_year = dec_year + 2  # End year
+
+# Discount rate
+discount_rate = 0.05
 
+# Discount factors of every year up to the end year, computed once at import
+discount_factors = (1 + discount_rate) ** -np.arange(0, end_year + 1)
+
+@njit(cache=True)
 def present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs):
     """
     Calculate the total present value of cable costs.
@@ -52,41 +73,17 @@ def present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs):
         deco_costs (float): Decommissioning costs.
 
     Returns:
-        tuple: A tuple containing the equipment costs, installation costs, and total present value of costs.
-    """
-    # Define years for installation, operational, and decommissioning
-    inst_year = 0  # First year
-    ope_year = inst_year + 5
-    dec_year = ope_year + 25  
-    end_year = dec_year + 2  # End year
-
-    # Discount rate
-    discount_rate = 0.05
-
-    # Define the years as a function of inst_year and end_year
-    years = range(inst_year, end_year + 1)
-
-    # Initialize total operational costs
-    ope_costs = 0
-    
-    # Adjust costs for each year
-    for year in years:
-        # Adjust installation costs
-        if year == inst_year:
-            equip_costs *= (1 + discount_rate) ** -year
-            inst_costs *= (1 + discount_rate) ** -year
-        # Adjust operational costs
-        if year >= inst_year and year < ope_year:
-            inst_costs *= (1 + discount_rate) ** -year
-        elif year >= ope_year and year < dec_year:
-            ope_costs_yearly *= (1 + discount_rate) ** -year
-            ope_costs += ope_costs_yearly  # Accumulate yearly operational costs
-        # Adjust decommissioning costs
-        if year >= dec_year and year <= end_year:
-            deco_costs *= (1 + discount_rate) ** -year
+        float: Total present value of costs.
+    """
+    # Discount installation costs for the installation year
+    inst_pv = (equip_costs + inst_costs) * discount_factors[inst_year]
+    # Discount operational costs for each operational year
+    ope_pv = ope_costs_yearly * discount_factors[ope_year:dec_year].sum()
+    # Discount decommissioning costs for the decommissioning year
+    deco_pv = deco_costs * discount_factors[dec_year]
 
     # Calculate total present value of costs
-    total_costs = equip_costs + inst_costs + ope_costs + deco_costs
+    total_costs = inst_pv + ope_pv + deco_pv
 
     return total_costs
 
@@ -122,281 +119,271 @@ def haversine_distance_scalar(lon1, lat1, lon2, lat2):
 
     return distance
 
+# Define data_tuples where each column represents (tension, section, resistance, capacitance, ampacity, cost, inst_cost)
+cable_data = [
+    (132, 630, 39.5, 209, 818, 406, 335),
+    (132, 800, 32.4, 217, 888, 560, 340),
+    (132, 1000, 27.5, 238, 949, 727, 350),
+    (220, 500, 48.9, 136, 732, 362, 350),
+    (220, 630, 39.1, 151, 808, 503, 360),
+    (220, 800, 31.9, 163, 879, 691, 370),
+    (220, 1000, 27.0, 177, 942, 920, 380),
+    (400, 800, 31.4, 130, 870, 860, 540),
+    (400, 1000, 26.5, 140, 932, 995, 555),
+    (400, 1200, 22.1, 170, 986, 1130, 570),
+    (400, 1400, 18.9, 180, 1015, 1265, 580),
+    (400, 1600, 16.6, 190, 1036, 1400, 600),
+    (400, 2000, 13.2, 200, 1078, 1535, 615)
+]
+
+# Define the scaling factors for each column: 
+"""
+Voltage (kV) > (V)
+Section (mm^2) > (m^2)
+Resistance (mΩ/km) > (Ω/m)
+Capacitance (nF/km) > (F/m)
+Ampacity (A)
+Equipment cost (eu/m)
+Installation cost (eu/m)
+"""
+scaling_factors = np.array([1e3, 1e-6, 1e-6, 1e-12, 1, 1, 1])
+
+# Convert data_tuples to a NumPy array and apply scaling to each column once at import
+cable_array = np.array(cable_data) * scaling_factors
+
+# Filter the scaled cable data based on the export voltage (kV > V), and split it into the columns used per call
+required_voltage = 400
+export_cable_array = cable_array[cable_array[:, 0] >= required_voltage * 1e3]
+cable_voltage, cable_resistance = export_cable_array[:, 0], export_cable_array[:, 2]
+cable_nominal_power = export_cable_array[:, 0] * export_cable_array[:, 4]
+cable_equip_cost, cable_inst_cost = export_cable_array[:, 5], export_cable_array[:, 6]
+
 def export_cable_costs(distance, required_active_power, polarity = "AC"):
     """
-    Calculate the costs associated with selecting export cables for a given length, desired capacity,
-    and desired voltage.
+    Calculate the export cable costs of a single connection, selecting the cheapest cable.
 
     Parameters:
-        length (float): The length of the cable (in meters).
-        desired_capacity (float): The desired capacity of the cable (in watts).
-        desired_voltage (int): The desired voltage of the cable (in kilovolts).
+        distance (float): Distance of the connection.
+        required_active_power (float): Required active power of the connection (in MW).
+        polarity (str, optional): Polarity of the cables ('AC' or 'DC'). Defaults to 'AC'.
 
     Returns:
-        tuple: A tuple containing the equipment costs, installation costs, and total costs
-                associated with the selected HVAC cables.
+        float: Total present value of costs of the connection.
     """
+    return export_cable_costs_array([distance], [required_active_power], polarity)[0]
 
-    length = 1.2 * distance
-    
-    required_active_power *= 1e6 # (MW > W)
-    required_voltage = 400
-    
-    # Define data_tuples where each column represents (tension, section, resistance, capacitance, ampacity, cost, inst_cost)
-    cable_data = [
-        (132, 630, 39.5, 209, 818, 406, 335),
-        (132, 800, 32.4, 217, 888, 560, 340),
-        (132, 1000, 27.5, 238, 949, 727, 350),
-        (220, 500, 48.9, 136, 732, 362, 350),
-        (220, 630, 39.1, 151, 808, 503, 360),
-        (220, 800, 31.9, 163, 879, 691, 370),
-        (220, 1000, 27.0, 177, 942, 920, 380),
-        (400, 800, 31.4, 130, 870, 860, 540),
-        (400, 1000, 26.5, 140, 932, 995, 555),
-        (400, 1200, 22.1, 170, 986, 1130, 570),
-        (400, 1400, 18.9, 180, 1015, 1265, 580),
-        (400, 1600, 16.6, 190, 1036, 1400, 600),
-        (400, 2000, 13.2, 200, 1078, 1535, 615)
-    ]
+def export_cable_costs_array(distances, required_active_powers, polarity = "AC"):
+    """
+    Calculate the export cable costs of many connections at once, selecting the cheapest cable for each.
 
-    # Convert data_tuples to a NumPy array
-    data_array = np.array(cable_data)
-    
-    # Filter data based on desired voltage
-    data_array = data_array[data_array[:, 0] >= required_voltage]
+    Parameters:
+        distances (np.ndarray): Distances of the connections.
+        required_active_powers (np.ndarray): Required active power of each connection (in MW).
+        polarity (str, optional): Polarity of the cables ('AC' or 'DC'). Defaults to 'AC'.
 
-    # Define the scaling factors for each column: 
-    """
-    Voltage (kV) > (V)
-    Section (mm^2) > (m^2)
-    Resistance (mΩ/km) > (Ω/m)
-    Capacitance (nF/km) > (F/m)
-    Ampacity (A)
-    Equipment cost (eu/m)
-    Installation cost (eu/m)
+    Returns:
+        np.ndarray: Total present value of costs of each connection.
     """
-    scaling_factors = np.array([1e3, 1e-6, 1e-6, 1e-12, 1, 1, 1])
-
-    # Apply scaling to each column in data_array
-    data_array *= scaling_factors
+    length = 1.2 * np.asarray(distances, dtype=float)[:, None]
+    
+    required_active_powers = np.asarray(required_active_powers, dtype=float)[:, None] * 1e6 # (MW > W)
 
     power_factor = 0.90
-    cable_count = []  # To store the number of cables and corresponding cable data
-
-    for cable in data_array:
-        voltage, resistance, capacitance, ampacity = cable[0], cable[2], cable[3], cable[4]
-        nominal_power_per_cable = voltage * ampacity
-        if polarity == "AC": # Three phase AC
-            ac_apparent_power = required_active_power / power_factor
-            # Determine number of cables needed based on required total apparent power
-            n_cables = np.ceil(ac_apparent_power / nominal_power_per_cable)
-            
-            current = ac_apparent_power / voltage
-            
-        else:  # Assuming polarity == "DC"
-            # Determine number of cables needed based on required power
-            n_cables = np.ceil(required_active_power / nominal_power_per_cable)
-            
-            current = required_active_power / voltage
-        
-        resistive_losses = current ** 2 * resistance * length / n_cables
-        power_eff = (resistive_losses / required_active_power)
-        
-        # Add the calculated data to the list
-        cable_count.append((cable, n_cables))
-
-    # Calculate the total costs for each cable combination
-    equip_costs_array = [(cable[5] * length * n_cables) for cable, n_cables in cable_count]
-    inst_costs_array = [(cable[6] * length * n_cables) for cable, n_cables in cable_count]
+    required_powers = required_active_powers / power_factor if polarity == "AC" else required_active_powers
+    
+    # Number of cables needed, one row per connection and one column per cable
+    n_cables = np.ceil(required_powers / cable_nominal_power)
     
-    # Calculate total costs
-    total_costs_array = np.add(equip_costs_array, inst_costs_array)
+    # Calculate the costs for each cable combination and pick the cheapest cable per connection
+    equip_costs_array = cable_equip_cost * length * n_cables
+    inst_costs_array = cable_inst_cost * length * n_cables
+    min_cost_index = np.argmin(equip_costs_array + inst_costs_array, axis=1)[:, None]
     
-    # Find the cable combination with the minimum total cost
-    min_cost_index = np.argmin(total_costs_array)
+    equip_costs = np.take_along_axis(equip_costs_array, min_cost_index, axis=1)[:, 0]
+    inst_costs = np.take_along_axis(inst_costs_array, min_cost_index, axis=1)[:, 0]
+    ope_costs_yearly = 0.2 * 1e-2 * equip_costs
+    deco_costs = 0.5 * inst_costs
+    
+    # Calculate present value
+    return present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs)
+
+def inter_array_cable_costs_array(distances, capacities):
+    """
+    Calculate the inter-array cable costs of many connections at once.
 
-    # Initialize costs
-    equip_costs = equip_costs_array[min_cost_index]
-    inst_costs = inst_costs_array[min_cost_index]
+    Parameters:
+        distances (np.ndarray): Distances of the connections (in kilometers).
+        capacities (np.ndarray): Capacity of the wind farm of each connection (in MW).
+
+    Returns:
+        np.ndarray: Total present value of costs of each connection.
+    """
+    # Number of parallel cables and their costs, with the distances in meters
+    equip_costs, inst_costs = iac_cost_ceil(np.asarray(distances, dtype=float) * 1e3, np.asarray(capacities, dtype=float))
+    
+    # Convert the costs from millions of euros to euros, as used by the other cost functions
+    equip_costs, inst_costs = equip_costs * 1e6, inst_costs * 1e6
     ope_costs_yearly = 0.2 * 1e-2 * equip_costs
     deco_costs = 0.5 * inst_costs
     
     # Calculate present value
-    total_costs = present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs)
+    return present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs)
+
+# Support structure codes: 0 = sand island, 1 = jacket, 2 = floating
+# Coefficients for equipment cost calculation per support structure
+support_structure_coeff = np.array([
+    (3.26, 804, 0, 0),  # sandisland
+    (233, 47, 309, 62),  # jacket
+    (87, 68, 116, 91)  # floating
+])
+
+# Power converter coefficients, row 0 = AC, row 1 = DC
+equip_coeff = np.array([
+    (22.87, 7.06),
+    (102.93, 31.75)
+])
+
+# Installation and decommissioning coefficients per support structure and vessel
+# (sandisland: SUBV, jacket: PSIV, floating: HLCV and AHV), unused vessel rows are zero
+inst_coeff = np.array([
+    [(20000, 25, 2000, 6000, 15), (0, 0, 0, 0, 0)],
+    [(1, 18.5, 24, 96, 200), (0, 0, 0, 0, 0)],
+    [(1, 22.5, 10, 0, 40), (3, 18.5, 30, 90, 40)]
+])
+
+deco_coeff = np.array([
+    [(20000, 25, 2000, 6000, 15), (0, 0, 0, 0, 0)],
+    [(1, 18.5, 24, 96, 200), (0, 0, 0, 0, 0)],
+    [(1, 22.5, 10, 0, 40), (3, 18.5, 30, 30, 40)]
+])
+
+@njit(cache=True)
+def inst_deco_costs(support, water_depth, port_distance, equiv_capacity, coeff):
+    """
+    Calculate installation or decommissioning costs of offshore substations based on the water depth, and port distance.
 
+    Returns:
+    - float: Calculated installation or decommissioning costs.
+    """
+    if support == 0:
+        c1, c2, c3, c4, c5 = coeff[0, 0]
+        # Calculate costs for sand island
+        water_depth = max(0, water_depth)
+        area_island = (equiv_capacity * 5)
+        slope = 0.75
+        r_hub = np.sqrt(area_island/np.pi)
+        r_seabed = r_hub + (water_depth + 3) / slope
+        volume_island = (1/3) * slope * np.pi * (r_seabed ** 3 - r_hub ** 3)
+        
+        return ((volume_island / c1) * ((2 * port_distance) / c2) + (volume_island / c3) + (volume_island / c4)) * (c5 * 1000) / 24
+    
+    # Sum the costs over the vessels of the jacket or floating support structure
+    total_costs = 0.0
+    for vessel in range(1 if support == 1 else 2):
+        c1, c2, c3, c4, c5 = coeff[support, vessel]
+        total_costs += ((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1000) / 24
     return total_costs
 
-def offshore_substation_costs(water_depth, ice_cover, port_distance, oss_capacity, polarity = "AC"):
+@njit(cache=True)
+def oss_costs(water_depth, ice_cover, port_distance, oss_capacity, is_dc):
     """
-    Estimate the costs associated with an offshore substation based on various parameters.
+    Estimate the costs of an offshore substation in a single compiled function.
 
     Parameters:
     - water_depth (float): Water depth at the location of the offshore substation.
     - ice_cover (int): Indicator of ice cover presence (1 for presence, 0 for absence).
     - port_distance (float): Distance from the offshore location to the nearest port.
     - oss_capacity (float): Capacity of the offshore substation.
-    - polarity (str, optional): Polarity of the substation ('AC' or 'DC'). Defaults to 'AC'.
+    - is_dc (int): Polarity of the substation (0 for AC, 1 for DC).
 
     Returns:
     - float: Estimated total costs of the offshore substation.
     """
-    
-    def support_structure(water_depth):
-        """
-        Determines the support structure type based on water depth.
-
-        Returns:
-        - str: Support structure type ('monopile', 'jacket', 'floating', or 'default').
-        """
-        # Define depth ranges for different support structures
-        if water_depth < 30:
-            return "sandisland"
-        elif 30 <= water_depth < 150:
-            return "jacket"
-        elif 150 <= water_depth:
-            return "floating"
-
-    def equip_costs(water_depth, support_structure, ice_cover, oss_capacity, polarity):
-        """
-        Calculates the offshore substation equipment costs based on water depth, capacity, and export cable type.
-
-        Returns:
-        - float: Calculated equipment costs.
-        """
-        # Coefficients for equipment cost calculation based on the support structure and year
-        support_structure_coeff = {
-            'sandisland': (3.26, 804, 0, 0),
-            'jacket': (233, 47, 309, 62),
-            'floating': (87, 68, 116, 91)
-        }
-
-        equip_coeff = {
-            'AC': (22.87, 7.06),
-            'DC': (102.93, 31.75)
-        }
-        
-        # Define parameters
-        c1, c2, c3, c4 = support_structure_coeff[support_structure]
-        
-        c5, c6 = equip_coeff[polarity]
+    # Determine support structure based on water depth
+    if water_depth < 30:
+        support = 0
+    elif water_depth < 150:
+        support = 1
+    else:
+        support = 2
+    
+    # Define parameters
+    c1, c2, c3, c4 = support_structure_coeff[support]
+    c5, c6 = equip_coeff[is_dc]
+    
+    # Define equivalent electrical power
+    equiv_capacity = oss_capacity if is_dc else 0.5 * oss_capacity
+    
+    if support == 0:
+        # Calculate foundation costs for sand island
+        area_island = (equiv_capacity * 5)
+        slope = 0.75
+        r_hub = np.sqrt(area_island/np.pi)
+        r_seabed = r_hub + (water_depth + 3) / slope
+        volume_island = (1/3) * slope * np.pi * (r_seabed ** 3 - r_hub ** 3)
         
-        # Define equivalent electrical power
-        equiv_capacity = 0.5 * oss_capacity if polarity == "AC" else oss_capacity
-
-        if support_structure == 'sandisland':
-            # Calculate foundation costs for sand island
-            area_island = (equiv_capacity * 5)
-            slope = 0.75
-            r_hub = np.sqrt(area_island/np.pi)
-            r_seabed = r_hub + (water_depth + 3) / slope
-            volume_island = (1/3) * slope * np.pi * (r_seabed ** 3 - r_hub ** 3)
-            
-            supp_costs = c1 * volume_island + c2 * area_island
-        else:
-            # Calculate foundation costs for jacket/floating
-            supp_costs = (c1 * water_depth + c2 * 1000) * equiv_capacity + (c3 * water_depth + c4 * 1000)
-        
-        # Add support structure costs for ice cover adaptation
-        supp_costs = 1.10 * supp_costs if ice_cover == 1 else supp_costs
-        
-        # Power converter costs
-        conv_costs = c5 * oss_capacity * int(1e3) + c6 * int(1e6) #* int(1e3)
-        
-        # Calculate equipment costs
-        equip_costs = supp_costs + conv_costs
-        
-        return supp_costs, conv_costs, equip_costs
-
-    def inst_deco_costs(water_depth, support_structure, port_distance, oss_capacity, polarity, operation):
-        """
-        Calculate installation or decommissioning costs of offshore substations based on the water depth, and port distance.
-
-        Returns:
-        - float: Calculated installation or decommissioning costs.
-        """
-        # Installation coefficients for different vehicles
-        inst_coeff = {
-            ('sandisland','SUBV'): (20000, 25, 2000, 6000, 15),
-            ('jacket' 'PSIV'): (1, 18.5, 24, 96, 200),
-            ('floating','HLCV'): (1, 22.5, 10, 0, 40),
-            ('floating','AHV'): (3, 18.5, 30, 90, 40)
-        }
-
-        # Decommissioning coefficients for different vehicles
-        deco_coeff = {
-            ('sandisland','SUBV'): (20000, 25, 2000, 6000, 15),
-            ('jacket' 'PSIV'): (1, 18.5, 24, 96, 200),
-            ('floating','HLCV'): (1, 22.5, 10, 0, 40),
-            ('floating','AHV'): (3, 18.5, 30, 30, 40)
-        }
-
-        # Choose the appropriate coefficients based on the operation type
-        coeff = inst_coeff if operation == 'inst' else deco_coeff
-
-        if support_structure == 'sandisland':
-            c1, c2, c3, c4, c5 = coeff[('sandisland','SUBV')]
-            # Define equivalent electrical power
-            equiv_capacity = 0.5 * oss_capacity if polarity == "AC" else oss_capacity
-            
-            # Calculate installation costs for sand island
-            water_depth = max(0, water_depth)
-            area_island = (equiv_capacity * 5)
-            slope = 0.75
-            r_hub = np.sqrt(area_island/np.pi)
-            r_seabed = r_hub + (water_depth + 3) / slope
-            volume_island = (1/3) * slope * np.pi * (r_seabed ** 3 - r_hub ** 3)
-            
-            total_costs = ((volume_island / c1) * ((2 * port_distance) / c2) + (volume_island / c3) + (volume_island / c4)) * (c5 * 1000) / 24
-            
-        elif support_structure == 'jacket':
-            c1, c2, c3, c4, c5 = coeff[('jacket' 'PSIV')]
-            # Calculate installation costs for jacket
-            total_costs = ((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1000) / 24
-        elif support_structure == 'floating':
-            total_costs = 0
-            
-            # Iterate over the coefficients for floating (HLCV and AHV)
-            for vessel_type in [('floating', 'HLCV'), ('floating', 'AHV')]:
-                c1, c2, c3, c4, c5 = coeff[vessel_type]
-                # Calculate installation costs for the current vessel type
-                vessel_costs = ((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1000) / 24
-                # Add the costs for the current vessel type to the total costs
-                total_costs += vessel_costs
-        else:
-            total_costs = None
-            
-        return inst_deco_costs
-
-    def oper_costs(support_structure, supp_costs, conv_costs):
-        
-        ope_exp = 0.03 * conv_costs + 0.015 * supp_costs if support_structure == "sandisland" else 0.03 * conv_costs
-        
-        return ope_exp
-
-    # Determine support structure
-    supp_structure = support_structure(water_depth)
+        supp_costs = c1 * volume_island + c2 * area_island
+    else:
+        # Calculate foundation costs for jacket/floating
+        supp_costs = (c1 * water_depth + c2 * 1000) * equiv_capacity + (c3 * water_depth + c4 * 1000)
+    
+    # Add support structure costs for ice cover adaptation
+    if ice_cover == 1:
+        supp_costs = 1.10 * supp_costs
+    
+    # Power converter costs
+    conv_costs = c5 * oss_capacity * 1e3 + c6 * 1e6
     
     # Calculate equipment costs
-    supp_costs, conv_costs, equip_costs =  equip_costs(water_depth, supp_structure, ice_cover, oss_capacity, polarity)
+    equip_costs = supp_costs + conv_costs
 
     # Calculate installation and decommissioning costs
-    inst_costs = inst_deco_costs(water_depth, supp_structure, port_distance, oss_capacity, polarity, "inst")
-    deco_costs = inst_deco_costs(water_depth, supp_structure, port_distance, oss_capacity, polarity, "deco")
+    inst_costs = inst_deco_costs(support, water_depth, port_distance, equiv_capacity, inst_coeff)
+    deco_costs = inst_deco_costs(support, water_depth, port_distance, equiv_capacity, deco_coeff)
 
     # Calculate yearly operational costs
-    ope_costs_yearly = oper_costs(support_structure, supp_costs, conv_costs)
+    ope_costs_yearly = 0.03 * conv_costs + 0.015 * supp_costs if support == 0 else 0.03 * conv_costs
     
     # Calculate present value of costs    
-    oss_costs = present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs)
-    
-    return oss_costs
+    return present_value(equip_costs, inst_costs, ope_costs_yearly, deco_costs)
+
+@njit(cache=True)
+def oss_costs_array(water_depth, ice_cover, port_distance, oss_capacity, is_dc):
+    """
+    Estimate the costs of many offshore substations in one compiled loop, the parameters are arrays of equal length.
+
+    Returns:
+    - np.ndarray: Estimated total costs of each offshore substation.
+    """
+    costs = np.empty(water_depth.shape[0])
+    for i in range(water_depth.shape[0]):
+        costs[i] = oss_costs(water_depth[i], ice_cover[i], port_distance[i], oss_capacity[i], is_dc)
+    return costs
+
+def offshore_substation_costs(water_depth, ice_cover, port_distance, oss_capacity, polarity = "AC"):
+    """
+    Estimate the costs associated with an offshore substation based on various parameters.
+
+    Parameters:
+    - water_depth (float): Water depth at the location of the offshore substation.
+    - ice_cover (int): Indicator of ice cover presence (1 for presence, 0 for absence).
+    - port_distance (float): Distance from the offshore location to the nearest port.
+    - oss_capacity (float): Capacity of the offshore substation.
+    - polarity (str, optional): Polarity of the substation ('AC' or 'DC'). Defaults to 'AC'.
+
+    Returns:
+    - float: Estimated total costs of the offshore substation.
+    """
+    return oss_costs_array(np.array([water_depth], dtype=float), np.array([ice_cover], dtype=np.int64), np.array([port_distance], dtype=float),
+                           np.array([oss_capacity], dtype=float), int(polarity == "DC"))[0]
 
 
 from pyomo.environ import *
 import numpy as np
 import os
 from math import radians, cos, sin, asin, sqrt
-from itertools import product
+from collections import defaultdict
+from pyomo.core.expr.numeric_expr import LinearExpression
 
 def haversine(lon1, lat1, lon2, lat2):
     """
@@ -414,31 +401,51 @@ def haversine(lon1, lat1, lon2, lat2):
     r = 6371  # Radius of Earth in kilometers
     return c * r
 
-def find_viable_iac(wf_lon, wf_lat, oss_lon, oss_lat):
+def find_viable_iac(wf_lon, wf_lat, oss_lon, oss_lat, wf_iso, oss_iso):
     """
-    Find all pairs of offshore and onshore substations within 300km using NumPy.
+    Find all pairs of wind farms and offshore substations within 150km using NumPy,
+    ensuring that they belong to the same country based on their ISO codes.
     
-    Parameters are dictionaries keyed by substation IDs with longitude and latitude values.
+    Parameters are dictionaries keyed by IDs with longitude and latitude values.
     """
-    connections = []
-    for wf_key, oss_key in product(wf_lon.keys(), oss_lon.keys()):
-        distance = haversine(wf_lon[wf_key], wf_lat[wf_key], oss_lon[oss_key], oss_lat[oss_key])
-        if distance <= 150:
-            connections.append((wf_key, oss_key))
-    return connections
+    wf_keys, oss_keys = list(wf_lon), list(oss_lon)
+    
+    # Broadcast the wind farms over the rows and the offshore substations over the columns
+    wf_lon_arr, wf_lat_arr = np.array([wf_lon[key] for key in wf_keys], dtype=float), np.array([wf_lat[key] for key in wf_keys], dtype=float)
+    oss_lon_arr, oss_lat_arr = np.array([oss_lon[key] for key in oss_keys], dtype=float), np.array([oss_lat[key] for key in oss_keys], dtype=float)
+    distances = haversine(wf_lon_arr[:, None], wf_lat_arr[:, None], oss_lon_arr[None, :], oss_lat_arr[None, :])
+    
+    # Compare the ISO codes over the same grid
+    same_iso = np.array([wf_iso[key] for key in wf_keys])[:, None] == np.array([oss_iso[key] for key in oss_keys])[None, :]
+    
+    rows, cols = np.nonzero((distances <= 150) & same_iso)
+    connections = [(wf_keys[i], oss_keys[j]) for i, j in zip(rows.tolist(), cols.tolist())]
+    
+    # Keep the distances of the viable pairs as plain constants keyed by connection
+    return connections, dict(zip(connections, distances[rows, cols].tolist()))
 
-def find_viable_ec(oss_lon, oss_lat, onss_lon, onss_lat):
+def find_viable_ec(oss_lon, oss_lat, onss_lon, onss_lat, oss_iso, onss_iso):
     """
-    Find all pairs of offshore and onshore substations within 300km.
+    Find all pairs of offshore and onshore substations within 300km using NumPy,
+    ensuring that they belong to the same country based on their ISO codes.
     
     Parameters are dictionaries keyed by substation IDs with longitude and latitude values.
     """
-    connections = []
-    for oss_key, onss_key in product(oss_lon.keys(), onss_lon.keys()):
-        distance = haversine(oss_lon[oss_key], oss_lat[oss_key], onss_lon[onss_key], onss_lat[onss_key])
-        if distance <= 300:
-            connections.append((oss_key, onss_key))
-    return connections
+    oss_keys, onss_keys = list(oss_lon), list(onss_lon)
+    
+    # Broadcast the offshore substations over the rows and the onshore substations over the columns
+    oss_lon_arr, oss_lat_arr = np.array([oss_lon[key] for key in oss_keys], dtype=float), np.array([oss_lat[key] for key in oss_keys], dtype=float)
+    onss_lon_arr, onss_lat_arr = np.array([onss_lon[key] for key in onss_keys], dtype=float), np.array([onss_lat[key] for key in onss_keys], dtype=float)
+    distances = haversine(oss_lon_arr[:, None], oss_lat_arr[:, None], onss_lon_arr[None, :], onss_lat_arr[None, :])
+    
+    # Compare the ISO codes over the same grid
+    same_iso = np.array([oss_iso[key] for key in oss_keys])[:, None] == np.array([onss_iso[key] for key in onss_keys])[None, :]
+    
+    rows, cols = np.nonzero((distances <= 300) & same_iso)
+    connections = [(oss_keys[i], onss_keys[j]) for i, j in zip(rows.tolist(), cols.tolist())]
+    
+    # Keep the distances of the viable pairs as plain constants keyed by connection
+    return connections, dict(zip(connections, distances[rows, cols].tolist()))
 
 def opt_model(workspace_folder):
     """
@@ -526,14 +533,25 @@ def opt_model(workspace_folder):
     Define decision variables
     """
     # Calculate viable connections
-    viable_iac = find_viable_iac(wf_lon, wf_lat, oss_lon, oss_lat)
-    viable_ec = find_viable_ec(oss_lon, oss_lat, onss_lon, onss_lat)
+    viable_iac, iac_dist = find_viable_iac(wf_lon, wf_lat, oss_lon, oss_lat, wf_iso, oss_iso)
+    viable_ec, ec_dist = find_viable_ec(oss_lon, oss_lat, onss_lon, onss_lat, oss_iso, onss_iso)
 
     # You can then integrate these connections into your model as needed
     # For example, as a Pyomo Set
     model.viable_iac = Set(initialize= viable_iac, dimen=2)
     model.viable_ec = Set(initialize= viable_ec, dimen=2)
     
+    # Group the viable connections by each of their ends once, so the rules read the incident connections directly
+    iac_osss_by_wf, iac_wfs_by_oss = defaultdict(list), defaultdict(list)
+    for wf, oss in viable_iac:
+        iac_osss_by_wf[wf].append(oss)
+        iac_wfs_by_oss[oss].append(wf)
+    
+    ec_onsss_by_oss, ec_osss_by_onss = defaultdict(list), defaultdict(list)
+    for oss, onss in viable_ec:
+        ec_onsss_by_oss[oss].append(onss)
+        ec_osss_by_onss[onss].append(oss)
+    
     model.select_wf = Var(wf_keys, within=Binary)
     model.select_oss = Var(oss_keys, within=Binary)
     model.select_iac = Var(model.viable_iac, within=Binary)
@@ -544,32 +562,23 @@ def opt_model(workspace_folder):
     Define Expressions
     """
     
-    # Distance expressions
-    def iac_dist_rule(model, wf, oss):
-        return haversine(model.wf_lon[wf], model.wf_lat[wf], model.oss_lon[oss], model.oss_lat[oss])
-    model.iac_dist = Expression(wf_keys, oss_keys, rule=iac_dist_rule)
-    
-    def ec_dist_rule(model, oss, onss):
-        return haversine(model.oss_lon[oss], model.oss_lat[oss], model.onss_lon[onss], model.onss_lat[onss])
-    model.ec_dist = Expression(oss_keys, onss_keys, rule=ec_dist_rule)
-    
     # Capacity expressions
     def oss_capacity_rule(model, oss):
-        return sum(model.wf_capacity[wf] * model.wf_oss_connection[wf, oss] for wf in wf_keys)
+        return sum(model.wf_cap[wf] * model.select_iac[wf, oss] for wf in iac_wfs_by_oss.get(oss, []))
     model.oss_capacity = Expression(oss_keys, rule=oss_capacity_rule)
 
-    def ec_capacity_rule(model, ec):
-        return sum(model.oss_capacity[oss] * model.oss_onss_connection[wf, ec] for wf in wf_keys)
-    model.ec_capacity = Expression(model.viable_ec, rule=ec_capacity_rule)
+    # Cost constants, all substations and cables are evaluated in one batch before building the objective
+    # Each offshore substation and its export cables are sized for the capacity of the wind farms that can reach it
+    oss_reach_cap = {oss: sum(wf_cap[wf] for wf in iac_wfs_by_oss.get(oss, [])) for oss in oss_keys}
+    oss_cost_arr = oss_costs_array(np.array([oss_wdepth[oss] for oss in oss_keys], dtype=float), np.array([oss_icover[oss] for oss in oss_keys], dtype=np.int64),
+                                   np.array([oss_pdist[oss] for oss in oss_keys], dtype=float), np.array([oss_reach_cap[oss] for oss in oss_keys], dtype=float), 0)
+    oss_cost = dict(zip(oss_keys, oss_cost_arr.tolist()))
     
-    # Cost expressions
-    def oss_cost_rule(model, oss):
-        return offshore_substation_costs(model.oss_wdepth[oss], model.oss_icec[oss], model.oss_pdist[oss], model.oss_capacity[oss], "AC")
-    model.oss_costs = Expression(oss_keys, rule=oss_cost_rule)
+    iac_cost_arr = inter_array_cable_costs_array([iac_dist[iac] for iac in viable_iac], [wf_cap[wf] for wf, _ in viable_iac])
+    iac_cost = dict(zip(viable_iac, iac_cost_arr.tolist()))
     
-    def ec_cost_rule(model, oss, onss):
-        return export_cable_costs(model.ec_dist[oss, onss], model.ec_capacity[oss, onss], polarity="AC")
-    model.ec_costs = Expression(model.viable_ec, rule=ec_cost_rule)
+    ec_cost_arr = export_cable_costs_array([ec_dist[ec] for ec in viable_ec], [oss_reach_cap[oss] for oss, _ in viable_ec], polarity="AC")
+    ec_cost = dict(zip(viable_ec, ec_cost_arr.tolist()))
     
     
     """
@@ -577,13 +586,13 @@ def opt_model(workspace_folder):
     """
     def total_cost_rule(model):
         # Summing wind farm costs
-        wf_total_cost = sum(wf_costs[wf] * model.select_wf[wf] for wf in wf_keys)
+        wf_total_cost = quicksum(wf_costs[wf] * model.select_wf[wf] for wf in wf_keys)
         # Summing offshore substation costs
-        oss_total_cost = sum(model.oss_costs[oss] * model.select_oss[oss] for oss in oss_keys)
+        oss_total_cost = quicksum(oss_cost[oss] * model.select_oss[oss] for oss in oss_keys)
         # Summing inter array cable costs for viable connections
-        iac_total_cost = sum(model.ec_costs[wf, oss] for (wf, oss) in model.viable_ec)
+        iac_total_cost = quicksum(iac_cost[wf, oss] * model.select_iac[wf, oss] for (wf, oss) in viable_iac)
         # Summing export cable costs for viable connections
-        ec_total_cost = sum(model.ec_costs[oss, onss] for (oss, onss) in model.viable_ec)
+        ec_total_cost = quicksum(ec_cost[oss, onss] * model.select_ec[oss, onss] for (oss, onss) in viable_ec)
         # The objective is to minimize the total cost
         return wf_total_cost + oss_total_cost + iac_total_cost + ec_total_cost
 
@@ -598,34 +607,34 @@ def opt_model(workspace_folder):
     # Connection constraints
     # Constraint 1: If a wind farm is selected, it must be connected to at least one offshore substation
     def wf_must_connect_to_oss_rule(model, wf):
-        return sum(model.select_iac[wf, oss] for oss in oss_keys if (wf, oss) in model.viable_iac) >= model.select_wf[wf]
+        return sum(model.select_iac[wf, oss] for oss in iac_osss_by_wf.get(wf, [])) >= model.select_wf[wf]
     model.wf_must_connect_to_oss = Constraint(wf_keys, rule=wf_must_connect_to_oss_rule)
 
     # Constraint 2: If an offshore substation is selected, it must connect to at least one onshore substation
     def oss_connection_rule(model, oss):
-        return sum(model.select_ec[oss, onss] for onss in onss_keys if (oss, onss) in model.viable_ec) >= model.select_oss[oss]
+        return sum(model.select_ec[oss, onss] for onss in ec_onsss_by_oss.get(oss, [])) >= model.select_oss[oss]
     model.oss_connection = Constraint(oss_keys, rule=oss_connection_rule)
 
     # Constraint 3: Wind Farm Selection Implies Inter-Array Cable Selection
-    def wf_select_implies_iac_select_rule(model, wf, oss):
-        return model.select_wf[wf] <= sum(model.select_iac[wf, oss] for oss in oss_keys if (wf, oss) in model.viable_iac)
-    model.wf_select_implies_iac_select = Constraint(wf_keys, oss_keys, rule=wf_select_implies_iac_select_rule)
+    # Not built, this is the same row per wind farm as constraint 1.
 
     # Constraint 4: Inter-Array Cable Selection Implies Offshore Substation Selection
-    def iac_select_implies_oss_select_rule(model, wf, oss):
-        return model.select_iac[wf, oss] <= model.select_oss[oss]
-    model.iac_select_implies_oss_select = Constraint(model.viable_iac, rule=iac_select_implies_oss_select_rule)
+    # Aggregated per offshore substation, the number of viable inter-array cables is a tight big-M for the binary selections
+    def iac_select_implies_oss_select_rule(model, oss):
+        wfs = iac_wfs_by_oss[oss]
+        return sum(model.select_iac[wf, oss] for wf in wfs) <= len(wfs) * model.select_oss[oss]
+    model.iac_select_implies_oss_select = Constraint(list(iac_wfs_by_oss), rule=iac_select_implies_oss_select_rule)
 
     # Constraint 5: Offshore Substation Selection Implies Export Cable Selection
-    def oss_select_implies_ec_select_rule(model, oss, onss):
-        return model.select_oss[oss] <= sum(model.select_ec[oss, onss] for onss in onss_keys if (oss, onss) in model.viable_ec)
-    model.oss_select_implies_ec_select = Constraint(oss_keys, onss_keys, rule=oss_select_implies_ec_select_rule)
+    # Not built, this is the same row per offshore substation as constraint 2.
 
     # Constraint 6: Export Cable Selection Implies Onshore Substation Selection
     # This constraint assumes the introduction of a decision variable for selecting onshore substations, model.select_onss[onss].
-    def ec_select_implies_onss_select_rule(model, oss, onss):
-        return model.select_ec[oss, onss] <= model.select_onss[onss]
-    model.ec_select_implies_onss_select = Constraint(model.viable_ec, rule=ec_select_implies_onss_select_rule)
+    # Aggregated per onshore substation in the same way as constraint 4
+    def ec_select_implies_onss_select_rule(model, onss):
+        osss = ec_osss_by_onss[onss]
+        return sum(model.select_ec[oss, onss] for oss in osss) <= len(osss) * model.select_onss[onss]
+    model.ec_select_implies_onss_select = Constraint(list(ec_osss_by_onss), rule=ec_select_implies_onss_select_rule)
     
     
     # Additional Constraints for Capacity Matching
@@ -634,22 +643,22 @@ def opt_model(workspace_folder):
     def min_capacity_rule(model):
         # The total capacity of selected wind farms must meet or exceed a minimum requirement
         min_total_capacity = 1000  # Example minimum total capacity in MW
-        return sum(model.wf_cap[wf] * model.select_wf[wf] for wf in wf_keys) >= min_total_capacity
+        # Build the capacity sum directly from the coefficient and variable lists
+        wf_capacity = LinearExpression(constant=0, linear_coefs=[wf_cap[wf] for wf in wf_keys], linear_vars=[model.select_wf[wf] for wf in wf_keys])
+        return wf_capacity >= min_total_capacity
     model.min_capacity = Constraint(rule=min_capacity_rule)
 
     # Constraint 8: Matching Wind Farm Capacity and Inter-Array Cable Capacity
-    def iac_capacity_matching_rule(model, wf, oss):
-        # The capacity of the inter-array cables connecting a wind farm to an offshore substation
-        # should match the wind farm's capacity if the connection is selected.
-        return model.wf_cap[wf] * model.select_iac[wf, oss] <= model.wf_cap[wf]
-    model.iac_capacity_matching = Constraint(model.viable_iac, rule=iac_capacity_matching_rule)
+    # Not built, wf_cap * select_iac <= wf_cap holds for every binary select_iac, and the connections beyond
+    # the maximum distance are already left out of viable_iac, so no variable or constraint is needed for them.
 
     # Constraint 9: Matching Inter-Array Cable Capacity and Offshore Substation Capacity
     def oss_capacity_rule(model, oss):
         # The capacity of an offshore substation should equal the sum of capacities of all wind farms
         # connected to it through selected inter-array cables.
-        connected_wf_capacity = sum(model.wf_cap[wf] * model.select_iac[wf, oss] for wf in wf_keys if (wf, oss) in model.viable_iac)
-        return connected_wf_capacity <= sum(model.wf_cap[wf] for wf in wf_keys if model.select_oss[oss] == 1)
+        wfs = iac_wfs_by_oss.get(oss, [])
+        connected_wf_capacity = LinearExpression(constant=0, linear_coefs=[wf_cap[wf] for wf in wfs], linear_vars=[model.select_iac[wf, oss] for wf in wfs])
+        return connected_wf_capacity <= sum(wf_cap[wf] for wf in wfs) * model.select_oss[oss]
     model.oss_capacity_constraint = Constraint(oss_keys, rule=oss_capacity_rule)
 
     # Constraint 10: Matching OSS Capacity and Export Cable Combined Capacity
@@ -658,17 +667,16 @@ def opt_model(workspace_folder):
         # the capacity of the offshore substation. This uses model.oss_capacity, which reflects the total capacity
         # being routed through the offshore substation from connected wind farms.
         oss_capacity = model.oss_capacity[oss]  # Assuming model.oss_capacity[oss] has been defined as the OSS's capacity
-        oss_connected_ec_capacity = sum(model.wf_cap[wf] * model.select_ec[oss, onss] for onss in onss_keys for wf in wf_keys if (oss, onss) in model.viable_ec)
+        oss_connected_ec_capacity = sum(wf_cap[wf] for wf in iac_wfs_by_oss.get(oss, [])) * sum(model.select_ec[oss, onss] for onss in ec_onsss_by_oss.get(oss, []))
         return oss_connected_ec_capacity >= oss_capacity
     model.ec_combined_capacity_matching = Constraint(oss_keys, rule=ec_combined_capacity_matching_rule)
 
-
     return model
 
 model = opt_model(workspace_folder)
 
-# Solve the model
-solver = SolverFactory('glpk')
+# Solve the model in-process with HiGHS instead of writing a problem file for GLPK
+solver = SolverFactory('appsi_highs')
 solver.solve(model)
 
 # Output the solution
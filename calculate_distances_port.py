@@ -1,16 +1,15 @@
 import arcpy
 import numpy as np
-from math import radians, sin, cos, sqrt, atan2
 
 def haversine(lat1, lon1, lat2, lon2):
-    # Convert latitude and longitude from degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    # Convert latitude and longitude from degrees to radians, works element-wise on broadcastable arrays
+    lat1, lat2 = np.radians(lat1), np.radians(lat2)
+
+    # Haversine formula, squaring by multiplication
+    sin_dlat = np.sin((lat2 - lat1) / 2)
+    sin_dlon = np.sin(np.radians(lon2 - lon1) / 2)
+    a = sin_dlat * sin_dlat + np.cos(lat1) * np.cos(lat2) * sin_dlon * sin_dlon
+    c = 2 * np.arcsin(np.minimum(1.0, np.sqrt(a)))
     r = 6371 * 1e3  # Radius of Earth in meters
     distance = r * c  
 
@@ -53,14 +52,11 @@ def calculate_distances_oss_port():
             # Add a message for processing
             arcpy.AddMessage(f"Processing layer: {layer.name}")
 
-            # Add fields if they don't exist in the substation layer
+            # Add the fields that don't exist in the substation layer in a single call
             field_names = [field.name for field in arcpy.ListFields(layer)]
-            if "PortName" not in field_names:
-                arcpy.AddField_management(layer, "PortName", "TEXT")
-            if "Distance" not in field_names:
-                arcpy.AddField_management(layer, "Distance", "DOUBLE")
-            if "HarborSize" not in field_names:
-                arcpy.AddField_management(layer, "HarborSize", "TEXT")
+            missing_fields = [field for field in [["PortName", "TEXT"], ["Distance", "DOUBLE"], ["HarborSize", "TEXT"]] if field[0] not in field_names]
+            if missing_fields:
+                arcpy.management.AddFields(layer, missing_fields)
             
             # Define the list of Baltic Sea country codes
             baltic_sea_countries = ["DK", "EE", "FI", "DE", "LV", "LT", "PL", "SE"]
@@ -76,23 +72,19 @@ def calculate_distances_oss_port():
                     if int(arcpy.GetCount_management(port_layer).getOutput(0)) > 0:
                         break
 
-                # Get selected substation and port points
-                substation_points = np.array([(row[0].firstPoint.Y, row[0].firstPoint.X) for row in arcpy.da.SearchCursor(layer, "SHAPE@")])
-                port_data = [(row[0].firstPoint.Y, row[0].firstPoint.X, row[1], row[2]) for row in arcpy.da.SearchCursor(port_layer, ["SHAPE@", "PORT_NAME", "HARBORSIZE"])]
+                # Get selected substation and port points as (latitude, longitude) arrays, reading the coordinates as SHAPE@XY tuples so no geometry objects are created
+                substation_points = np.array([(y, x) for (x, y), in arcpy.da.SearchCursor(layer, ["SHAPE@XY"])], dtype=float).reshape(-1, 2)
+                port_data = [(y, x, port_name, harbor_size) for (x, y), port_name, harbor_size in arcpy.da.SearchCursor(port_layer, ["SHAPE@XY", "PORT_NAME", "HARBORSIZE"])]
+                port_points = np.array([port[:2] for port in port_data], dtype=float).reshape(-1, 2)
                 
-                # Initialize distances array
-                distances = np.zeros((len(substation_points), len(port_data)))
-                
-                # Compute distances using Haversine formula
-                for i, substation_point in enumerate(substation_points):
-                    for j, port_point in enumerate(port_data):
-                        distances[i, j] = haversine(substation_point[0], substation_point[1], port_point[0], port_point[1])
+                # Compute the distance matrix using the Haversine formula, broadcasting substations over rows and ports over columns
+                distances = haversine(substation_points[:, 0, None], substation_points[:, 1, None], port_points[None, :, 0], port_points[None, :, 1])
 
                 # Find indices of closest ports for each substation
                 closest_port_indices = np.argmin(distances, axis=1)
 
                 # Cursor to update substation features
-                with arcpy.da.UpdateCursor(layer, ["SHAPE@", "PortName", "Distance", "HarborSize"]) as substation_cursor:
+                with arcpy.da.UpdateCursor(layer, ["PortName", "Distance", "HarborSize"]) as substation_cursor:
                     for i, substation_row in enumerate(substation_cursor):
                         closest_port_index = closest_port_indices[i]
                         closest_port_distance = distances[i, closest_port_index]
@@ -100,9 +92,9 @@ def calculate_distances_oss_port():
                         closest_port_harborsize = port_data[closest_port_index][3]
 
                         # Update fields in substation layer with closest port information
-                        substation_row[1] = closest_port_name.lower().capitalize()
-                        substation_row[2] = round(closest_port_distance)
-                        substation_row[3] = closest_port_harborsize.lower().capitalize()
+                        substation_row[0] = closest_port_name.lower().capitalize()
+                        substation_row[1] = round(closest_port_distance)
+                        substation_row[2] = closest_port_harborsize.lower().capitalize()
                         substation_cursor.updateRow(substation_row)
 
             # Clear the selection for the current substation layer
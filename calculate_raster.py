@@ -84,18 +84,15 @@ def calculate_raster() -> None:
             field_infos = [[field, "DOUBLE"] for field in fields_to_add]
             arcpy.management.AddFields(layer, field_infos)
 
-        field_names = ["SHAPE@", "WaterDepth"]
+        field_names = ["SHAPE@XY", "WaterDepth"]
         if update_weibull:
             field_names.extend(["WeibullA", "WeibullK"])
 
         # Update the attribute table with water depth, Weibull-A, and Weibull-k values
         with arcpy.da.UpdateCursor(layer, field_names) as cursor:
             for row in cursor:
-                # Get the point geometry
-                point_geom = row[0]
-                
-                # Get the centroid of the point
-                point = point_geom.centroid
+                # Get the point coordinates as a tuple, so no geometry object is created
+                point_x, point_y = row[0]
                 
                 # Initialize values
                 water_depth = np.nan
@@ -110,10 +107,10 @@ def calculate_raster() -> None:
                         cell_height = desc.meanCellHeight
 
                         # Calculate the column index of the cell containing the point
-                        cell_column = round((point.X - extent.XMin) / cell_width)
+                        cell_column = round((point_x - extent.XMin) / cell_width)
                         
                         # Calculate the row index of the cell containing the point
-                        cell_row = round((extent.YMax - point.Y) / cell_height)
+                        cell_row = round((extent.YMax - point_y) / cell_height)
                         
                         # Check if the calculated indices are within bounds
                         if 0 <= cell_row < raster_array.shape[0] and 0 <= cell_column < raster_array.shape[1]:
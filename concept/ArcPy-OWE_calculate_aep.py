@@ -1,4 +1,5 @@
 import arcpy
+import math
 import numpy as np
 from scipy.interpolate import interp1d
 from scipy.stats import weibull_min
@@ -98,7 +99,7 @@ def calculate_aep_and_capacity_factor(weibullA, weibullK, turbine_locations, win
             lon_diff = lon_j - lon_i
             if wind_direction == "southwest":
                 if lat_diff <= 0 and lon_diff <= 0:  # Check if the turbine is downstream
-                    distance = np.sqrt(lat_diff**2 + lon_diff**2) * 111000  # Distance between turbines in meters (approximation)
+                    distance = math.hypot(lat_diff, lon_diff) * 111000  # Distance between turbines in meters (approximation)
                     wake_loss_factor = jensen_wake_loss_factor(distance, 100, wind_speed_array_112m[i], wind_speed_array_112m[j])
                     wake_loss_factors[j] *= wake_loss_factor
             else:
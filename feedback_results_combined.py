@@ -79,11 +79,10 @@ def create_polyline_feature_layer(map_obj, existing_layer_names, npy_file_path,
         ['Cost', 'DOUBLE']
     ]
     
-    # Create the feature class in the output workspace folder to store the polylines
+    # Create the feature class in the output workspace folder to store the polylines, replacing an earlier output
     lines_path = os.path.join(workspace_folder, f"{layer_name}.shp")
-    if arcpy.Exists(lines_path):
-        arcpy.Delete_management(lines_path)
-    arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POLYLINE', spatial_reference=4326)
+    with arcpy.EnvManager(overwriteOutput=True):
+        arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POLYLINE', spatial_reference=4326)
 
     # Add fields if they do not already exist
     add_fields_if_not_exist(lines_path, fields)
@@ -139,11 +138,10 @@ def create_point_feature_layer(map_obj, existing_layer_names, npy_file_path, wor
         arcpy.AddMessage(f"No data in {npy_file_path}. Skipping creation of {layer_name}.")
         return
     
-    # Create the feature class in the output workspace folder to store the points
+    # Create the feature class in the output workspace folder to store the points, replacing an earlier output
     points_path = os.path.join(workspace_folder, f"{layer_name}.shp")
-    if arcpy.Exists(points_path):
-        arcpy.Delete_management(points_path)
-    arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POINT', spatial_reference=4326)
+    with arcpy.EnvManager(overwriteOutput=True):
+        arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POINT', spatial_reference=4326)
     
     # Define the fields for the feature class
     fields = [
@@ -208,12 +206,11 @@ def create_polygon_feature_layer_from_points(map_obj, existing_layer_names, wfa_
 
     # Path for the new feature class
     polygons_path = os.path.join(workspace_folder, f"{layer_name}.shp")
-    if arcpy.Exists(polygons_path):
-        arcpy.Delete_management(polygons_path)
-    arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POLYGON', spatial_reference=4326)
-    
-    # Copy WFA polygons to the new feature class
-    arcpy.management.CopyFeatures(wfa_layer, polygons_path)
+
+    # Create the new feature class and copy the WFA polygons to it, replacing an earlier output
+    with arcpy.EnvManager(overwriteOutput=True):
+        arcpy.management.CreateFeatureclass(workspace_folder, layer_name, 'POLYGON', spatial_reference=4326)
+        arcpy.management.CopyFeatures(wfa_layer, polygons_path)
     
     # Get the OID field name
     oid_field = arcpy.Describe(polygons_path).OIDFieldName
@@ -1,5 +1,6 @@
 import arcpy
 import os
+from scripts.layer_cache import get_cached_layer
 
 def generate_offshore_substation_areas(output_folder):
     """
@@ -40,18 +41,16 @@ def generate_offshore_substation_areas(output_folder):
         arcpy.AddError("No layer starting with 'windfarmspoly' found in the current map.")
         return
     
-    # Deselect all currently selected features
-    arcpy.SelectLayerByAttribute_management(wf_layer, "CLEAR_SELECTION")
-
-    # Create a feature layer from the WFA layer
-    wfa_feature_layer = arcpy.management.MakeFeatureLayer(wf_layer, "wfa_feature_layer").getOutput(0)
+    # Clear any selection on the WFA layer, so all features it shows through its definition query are used
+    arcpy.management.SelectLayerByAttribute(wf_layer, "CLEAR_SELECTION")
+    wfa_feature_layer = wf_layer
     
     # Select the countries for the specified ISO codes
-    countries_layer = arcpy.management.MakeFeatureLayer(countries_feature_layer_url, "countries_layer").getOutput(0)
+    countries_layer = arcpy.management.MakeFeatureLayer(get_cached_layer(countries_feature_layer_url, "world_countries"), "countries_layer").getOutput(0)
     arcpy.management.SelectLayerByAttribute(countries_layer, "NEW_SELECTION", f"ISO_CC IN {tuple(iso_eez_country_code)}")
     
     # Create a feature layer for HELCOM MPA
-    helcom_mpa_layer = arcpy.management.MakeFeatureLayer(helcom_mpa_feature_layer_url, "helcom_mpa_layer").getOutput(0)
+    helcom_mpa_layer = arcpy.management.MakeFeatureLayer(get_cached_layer(helcom_mpa_feature_layer_url, "helcom_mpa"), "helcom_mpa_layer").getOutput(0)
     
     # Select the EEZ features for the specified ISO codes
     arcpy.management.SelectLayerByAttribute(eez_layer, "NEW_SELECTION", f"ISO_TER1 IN {tuple(iso_eez_country_code)}")
@@ -59,41 +58,40 @@ def generate_offshore_substation_areas(output_folder):
     # Create a polygon representing the area west of 9 degrees longitude
     west_of_9_deg_polygon = arcpy.Polygon(arcpy.Array([arcpy.Point(-10, 90), arcpy.Point(-10, -90), arcpy.Point(9, -90), arcpy.Point(9, 90), arcpy.Point(-10, 90)]), arcpy.SpatialReference(wkid))
 
-    # Save the west of 9 degrees polygon to a shapefile
-    west_of_9_deg_layer_path = os.path.join(output_folder, "west_of_9_deg_layer.shp")
+    # Keep the intermediate layers in the memory workspace, only the final output is written to disk
+    west_of_9_deg_layer_path = "memory\\west_of_9_deg_layer"
     arcpy.management.CopyFeatures(west_of_9_deg_polygon, west_of_9_deg_layer_path)
     
-    # Erase the part of the EEZ layer that is west of 9 degrees longitude
-    east_eez_layer_path = os.path.join(output_folder, "east_eez_layer.shp")
-    arcpy.AddMessage("Erasing west of 9 degrees from EEZ...")
-    arcpy.analysis.Erase(eez_layer, west_of_9_deg_layer_path, east_eez_layer_path)
-
     # Create a buffer around the selected countries
-    buffer_layer_path = os.path.join(output_folder, "buffered_country.shp")
+    buffer_layer_path = "memory\\buffered_country"
     arcpy.AddMessage("Buffering selected country...")
-    arcpy.analysis.PairwiseBuffer(countries_layer, buffer_layer_path, f"{float(buffer_distance)} Kilometers")
+    # Let the pairwise geoprocessing tools use all available cores, only for the duration of each call
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        arcpy.analysis.PairwiseBuffer(countries_layer, buffer_layer_path, f"{float(buffer_distance)} Kilometers")
 
-    # Erase the buffered areas from the EEZ layer
-    temp_erased_eez_path = os.path.join(output_folder, "temp_erased_eez.shp")
-    arcpy.AddMessage("Erasing buffered country from EEZ...")
-    arcpy.analysis.Erase(east_eez_layer_path, buffer_layer_path, temp_erased_eez_path)
+    # Combine the west of 9 degrees area, buffered countries, HELCOM MPA and WFA areas into a single obstacle layer
+    obstacles_path = "memory\\obstacles"
+    dissolved_obstacles_path = "memory\\obstacles_dissolved"
+    arcpy.AddMessage("Combining obstacle layers...")
+    arcpy.management.Merge([west_of_9_deg_layer_path, buffer_layer_path, helcom_mpa_layer, wfa_feature_layer], obstacles_path)
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        arcpy.analysis.PairwiseDissolve(obstacles_path, dissolved_obstacles_path)
 
-    # Erase the HELCOM MPA areas from the EEZ layer
-    final_erased_eez_path = os.path.join(output_folder, "final_erased_eez.shp")
-    arcpy.AddMessage("Erasing HELCOM MPA from EEZ...")
-    arcpy.analysis.Erase(temp_erased_eez_path, helcom_mpa_layer, final_erased_eez_path)
-
-    # Erase the WFA areas from the EEZ layer
-    final_erased_eez_with_wfa_path = os.path.join(output_folder, "final_erased_eez_with_wfa.shp")
-    arcpy.AddMessage("Erasing WFA layer from EEZ...")
-    arcpy.analysis.Erase(final_erased_eez_path, wfa_feature_layer, final_erased_eez_with_wfa_path)
+    # Erase all obstacles from the EEZ layer in a single pass
+    erased_eez_path = "memory\\erased_eez"
+    arcpy.AddMessage("Erasing obstacles from EEZ...")
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        arcpy.analysis.PairwiseErase(eez_layer, dissolved_obstacles_path, erased_eez_path)
     
     # Save the final output shapefile
     output_feature_class = os.path.join(output_folder, "EHA_BalticSea.shp")
     arcpy.AddMessage("Saving final output shapefile...")
-    arcpy.management.CopyFeatures(final_erased_eez_with_wfa_path, output_feature_class)
+    arcpy.management.CopyFeatures(erased_eez_path, output_feature_class)
     arcpy.AddMessage(f"Successfully processed and saved new EEZ shapefile for all selected Baltic Sea countries at {output_feature_class}.")
 
+    # Clear the intermediate layers from the memory workspace
+    arcpy.management.Delete("memory")
+
     # Add the generated shapefile to the current map
     map.addDataFromPath(output_feature_class)
 
@@ -27,22 +27,24 @@ def generate_turbine_areas(windfarm_folder: str):
         arcpy.AddError("No layer starting with 'windfarmspoly' found in the current map.")
         return
     
-    # Deselect all currently selected features
-    arcpy.SelectLayerByAttribute_management(wf_layer, "CLEAR_SELECTION")
-
     arcpy.AddMessage(f"Processing layer: {wf_layer.name}")
 
-    # Processing for selected countries and planned status
-    arcpy.management.SelectLayerByAttribute(wf_layer, "NEW_SELECTION", f"country IN {tuple(countries)} AND status = '{planned_status}'")
-    arcpy.management.CopyFeatures(wf_layer, "in_memory\\planned_wf_layer")
+    # Clear any selection, so the exports below filter all features the layer shows through its where clause
+    arcpy.management.SelectLayerByAttribute(wf_layer, "CLEAR_SELECTION")
+
+    # Let the geoprocessing tools that support it use all available cores, only for the exports and the split
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        # Export the selected countries with planned status, filtering the layer directly so its definition query is respected
+        arcpy.conversion.ExportFeatures(wf_layer, "in_memory\\planned_wf_layer",
+                                        where_clause=f"status = '{planned_status}' AND country IN {tuple(countries)}")
 
-    # Select other statuses (Production, Approved, Construction)
-    arcpy.management.SelectLayerByAttribute(wf_layer, "NEW_SELECTION", f"country IN {tuple(countries)} AND status IN {tuple(other_statuses)}")
-    arcpy.management.CopyFeatures(wf_layer, "in_memory\\other_wf_layer")
+        # Export other statuses (Production, Approved, Construction)
+        arcpy.conversion.ExportFeatures(wf_layer, "in_memory\\other_wf_layer",
+                                        where_clause=f"status IN {tuple(other_statuses)} AND country IN {tuple(countries)}")
 
-    # Split multipart polygons into singlepart polygons
-    arcpy.management.MultipartToSinglepart("in_memory\\planned_wf_layer", "in_memory\\planned_singlepart")
-    arcpy.management.MultipartToSinglepart("in_memory\\other_wf_layer", "in_memory\\other_singlepart")
+        # Split multipart polygons into singlepart polygons
+        arcpy.management.MultipartToSinglepart("in_memory\\planned_wf_layer", "in_memory\\planned_singlepart")
+        arcpy.management.MultipartToSinglepart("in_memory\\other_wf_layer", "in_memory\\other_singlepart")
 
     # Iterate through features and select those that meet the longitude condition
     with arcpy.da.UpdateCursor("in_memory\\planned_singlepart", ['SHAPE@X', 'country']) as cursor:
@@ -63,20 +65,23 @@ def generate_turbine_areas(windfarm_folder: str):
     # Remove duplicate features
     arcpy.management.DeleteIdentical("in_memory\\non_overlapping_wf_layer", ["SHAPE"])
 
-    # Make feature layers for selection
-    arcpy.management.MakeFeatureLayer("in_memory\\non_overlapping_wf_layer", "layer_to_check")
-    arcpy.management.MakeFeatureLayer("in_memory\\other_singlepart", "other_layer")
-
     delete_oids = set()
-    all_polygons = [row for row in arcpy.da.SearchCursor("layer_to_check", ['OID@', 'SHAPE@', 'AREA', 'country'])]
+    all_polygons = [row for row in arcpy.da.SearchCursor("in_memory\\non_overlapping_wf_layer", ['OID@', 'SHAPE@', 'AREA', 'country'])]
+
+    # Read the polygons with other statuses once, grouped by country
+    other_polygons = {}
+    with arcpy.da.SearchCursor("in_memory\\other_singlepart", ['SHAPE@', 'country']) as cursor:
+        for shape, country in cursor:
+            other_polygons.setdefault(country, []).append(shape)
+
+    # Read the extent of each polygon once so that pairs with disjoint extents can be skipped cheaply
+    extents = [(shape.extent.XMin, shape.extent.YMin, shape.extent.XMax, shape.extent.YMax) for _, shape, _, _ in all_polygons]
 
     for i, (oid1, shape1, area1, country1) in enumerate(all_polygons):
         arcpy.AddMessage(f"Checking polygon with OID {oid1}, area {area1}, and country {country1}")
 
         # Check for overlaps with other statuses in the same country
-        arcpy.management.SelectLayerByAttribute("other_layer", "NEW_SELECTION", f"country = '{country1}'")
-        arcpy.management.SelectLayerByLocation("other_layer", "INTERSECT", shape1, selection_type="SUBSET_SELECTION")
-        intersect_count = int(arcpy.management.GetCount("other_layer").getOutput(0))
+        intersect_count = sum(1 for other_shape in other_polygons.get(country1, []) if not shape1.disjoint(other_shape))
         arcpy.AddMessage(f"Found {intersect_count} intersecting polygons in other statuses for OID {oid1}")
         if intersect_count > 0:
             delete_oids.add(oid1)
@@ -84,8 +89,14 @@ def generate_turbine_areas(windfarm_folder: str):
             continue
 
         # Compare with other polygons in the planned layer in the same country
-        for oid2, shape2, area2, country2 in all_polygons[i+1:]:
-            if country1 == country2 and (shape1.overlaps(shape2) or shape1.contains(shape2) or shape1.within(shape2)):
+        xmin1, ymin1, xmax1, ymax1 = extents[i]
+        for j, (oid2, shape2, area2, country2) in enumerate(all_polygons[i+1:], start=i+1):
+            if country1 != country2:
+                continue
+            xmin2, ymin2, xmax2, ymax2 = extents[j]
+            if xmin2 > xmax1 or xmax2 < xmin1 or ymin2 > ymax1 or ymax2 < ymin1:
+                continue
+            if shape1.overlaps(shape2) or shape1.contains(shape2) or shape1.within(shape2):
                 arcpy.AddMessage(f"Comparing with polygon OID {oid2}, area {area2}, and country {country2}")
                 if area1 < area2:
                     arcpy.AddMessage(f"Marking polygon with OID {oid1} for deletion (smaller than polygon with OID {oid2})")
@@ -1,6 +1,33 @@
 import arcpy
 import os
 import numpy as np
+from scripts.projection import project_points, get_spatial_reference, get_utm_wkid
+
+def generate_grid_points(shape, spacing, sr):
+    """
+    Generates a regular grid of points within a polygon using a native square tessellation
+    over the polygon extent and a single clip operation.
+
+    Parameters:
+    - shape: Polygon geometry to fill with grid points.
+    - spacing: Spacing between the grid points, in meters.
+    - sr: Spatial reference of the polygon, in meters.
+
+    Returns:
+    - (M, 2) NumPy array of the XY coordinates within the polygon.
+    """
+    # Cover the extent of the polygon with square cells of the given spacing
+    arcpy.management.GenerateTessellation("memory\\grid_cells", shape.extent, "SQUARE", f"{spacing ** 2} SquareMeters", sr)
+
+    # Take the cell centroids as grid points and keep those within the polygon
+    arcpy.management.FeatureToPoint("memory\\grid_cells", "memory\\grid_points", "CENTROID")
+    arcpy.analysis.PairwiseClip("memory\\grid_points", shape, "memory\\clipped_points")
+    clipped = arcpy.da.FeatureClassToNumPyArray("memory\\clipped_points", ["SHAPE@X", "SHAPE@Y"])
+    arcpy.management.Delete("memory\\grid_cells")
+    arcpy.management.Delete("memory\\grid_points")
+    arcpy.management.Delete("memory\\clipped_points")
+
+    return np.column_stack((clipped["SHAPE@X"], clipped["SHAPE@Y"]))
 
 def generate_offshore_substation_coordinates(output_folder: str) -> None:
     """
@@ -13,9 +40,8 @@ def generate_offshore_substation_coordinates(output_folder: str) -> None:
     """
     spacing = 5 #km
     
-    # Set the spatial reference to a UTM Zone using its Well-Known ID (WKID)
-    utm33 = arcpy.SpatialReference(32633)
-    wgs84 = arcpy.SpatialReference(4326)
+    # Set the geographic spatial reference, the UTM zone is determined per feature
+    wgs84 = get_spatial_reference(4326)
 
     # Dictionary mapping 3-letter ISO country codes to 2-letter country codes for Baltic Sea countries
     iso_territory_dict = {
@@ -46,9 +72,6 @@ def generate_offshore_substation_coordinates(output_folder: str) -> None:
     output_feature_class_name = input_layer.name.replace('EHA', 'EHC') + ".shp"
     output_feature_class = os.path.join(output_folder, output_feature_class_name)
     
-    # Reproject input_layer to UTM
-    input_layer = arcpy.management.Project(input_layer, os.path.join("in_memory", "input_layer"), utm33)[0]
-
     # Create the output feature class for substations
     arcpy.management.CreateFeatureclass(output_folder, output_feature_class_name, "POINT", spatial_reference=wgs84)
 
@@ -62,70 +85,43 @@ def generate_offshore_substation_coordinates(output_folder: str) -> None:
     ])
 
     # Prepare to insert new substation point features
-    insert_cursor_fields = ["SHAPE@", "Territory", "ISO", "EH_ID", "Longitude", "Latitude"]
-    insert_cursor =  arcpy.da.InsertCursor(output_feature_class, insert_cursor_fields)
-    eh_id = 0
-    
-    # Generate points within the bounding box of the input layer's extent
-    # considering the specified spacing using NumPy
+    insert_cursor_fields = ["SHAPE@XY", "Territory", "ISO", "EH_ID", "Longitude", "Latitude"]
     eh_id = 0  # Initialize eh_id outside the loop
-    with arcpy.da.SearchCursor(input_layer, ["SHAPE@", "TERRITORY1", "ISO_TER1"]) as cursor:
-        rows = []
+    
+    # Generate points within each feature considering the specified spacing,
+    # keeping a single insert cursor open that is released once all points are written
+    with arcpy.da.InsertCursor(output_feature_class, insert_cursor_fields) as insert_cursor, \
+         arcpy.da.SearchCursor(input_layer, ["SHAPE@", "TERRITORY1", "ISO_TER1"]) as cursor:
         for row in cursor:
             shape, territory, iso_territory = row[0], row[1], row[2]
-            extent = shape.extent
-
-            # Calculate number of points in x and y directions
-            num_points_x = int((extent.width / (spacing * 1000)) + 1)
-            num_points_y = int((extent.height / (spacing * 1000)) + 1)
-
-            # Generate points within the extent directly
-            x_coords = np.linspace(extent.XMin, extent.XMax, num_points_x)
-            y_coords = np.linspace(extent.YMin, extent.YMax, num_points_y)
-
-            # Create grid of x and y coordinates using meshgrid
-            xx, yy = np.meshgrid(x_coords, y_coords)
-
-            # Flatten the grid to create a 2D array of points
-            points = np.column_stack((xx.flatten(), yy.flatten()))
 
-            # Create point geometries for all points
-            point_geometries = [arcpy.PointGeometry(arcpy.Point(*point), utm33) for point in points]
+            # Project the feature to the UTM zone of its centroid, projecting only the centroid to WGS 1984 to determine the zone
+            centroid = arcpy.PointGeometry(shape.centroid, shape.spatialReference).projectAs(wgs84).firstPoint
+            utm_sr = get_spatial_reference(get_utm_wkid(centroid.X, centroid.Y))
+            shape = shape.projectAs(utm_sr)
 
-            # Check containment of all points using vectorized operation
-            contains_mask = np.array([shape.contains(pt.centroid) for pt in point_geometries])
-
-            # Filter points using the containment mask
-            contained_points = points[contains_mask]
+            # Generate the grid points within the feature using a native tessellation
+            contained_points = generate_grid_points(shape, spacing * 1000, utm_sr)
 
             # Project the contained points to WGS 1984 spatial reference
-            projected_points = [pt.projectAs(wgs84) for pt in [arcpy.PointGeometry(arcpy.Point(*point), utm33) for point in contained_points]]
+            projected_points = project_points(contained_points, utm_sr, wgs84)
+
+            # Get the corresponding 2-letter country code from the mapping dictionary
+            iso_territory_2l = iso_territory_dict.get(iso_territory, "XX")
 
-            # Create rows to insert into feature class
-            for point in projected_points:
+            # Insert the rows directly into the feature class
+            for lon, lat in projected_points:
                 # Increment eh_id for each feature
                 eh_id += 1
-                # Get the corresponding 2-letter country code from the mapping dictionary
-                iso_territory_2l = iso_territory_dict.get(iso_territory, "XX")
-
-                rows.append((
-                    point,
+                insert_cursor.insertRow((
+                    (lon, lat),
                     territory,
                     iso_territory_2l,
                     eh_id,
-                    round(point.centroid.X, 6),
-                    round(point.centroid.Y, 6)
+                    round(lon, 6),
+                    round(lat, 6)
                 ))
 
-        # Insert rows in batches of 100
-        batch_size = 100
-        for i in range(0, len(rows), batch_size):
-            batch_rows = rows[i:i + batch_size]
-            for row in batch_rows:
-                insert_cursor.insertRow(row)
-            # Clear the batch_rows list after insertion
-            del batch_rows[:]
-
     # Add the generated shapefile to the current map
     map.addDataFromPath(output_feature_class)
         
@@ -1,8 +1,12 @@
 import arcpy
+import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import time
 import os
 from datetime import datetime
+from scripts.layer_cache import get_cached_layer
 
 def identify_countries(point_features):
     """
@@ -38,39 +42,41 @@ def identify_countries(point_features):
     # Select EEZ countries
     arcpy.analysis.Select(eez_layer, "in_memory\\eez_layer", f"ISO_TER1 IN {tuple(iso_eez_country_code)}")
 
-    # Create feature layer from URL
-    countries_layer = arcpy.management.MakeFeatureLayer(feature_layer_url, "countries_layer").getOutput(0)
-    # Select countries
-    arcpy.analysis.Select(countries_layer, "in_memory\\countries_polygon", f"ISO_CC IN {tuple(iso_eez_country_code)}")
-    # Project the feature layer to the specified UTM Zone
-    arcpy.management.Project("in_memory\\countries_polygon", "in_memory\\countries_projected", wgs84)
-
     # Create a buffer around the EEZ layer boundary
     arcpy.analysis.PairwiseBuffer("in_memory\\eez_layer", "in_memory\\eez_buffer", "600 Kilometers")
 
     # Select point features within the buffer
     arcpy.analysis.PairwiseClip(point_features, "in_memory\\eez_buffer", "in_memory\\point_features")
+
+    # Create feature layer from URL
+    countries_layer = arcpy.management.MakeFeatureLayer(get_cached_layer(feature_layer_url, "world_countries"), "countries_layer").getOutput(0)
+    # Select countries, keeping only those that intersect the point features so the spatial join has fewer candidate polygons
+    arcpy.management.SelectLayerByAttribute(countries_layer, "NEW_SELECTION", f"ISO_CC IN {tuple(iso_eez_country_code)}")
+    arcpy.management.SelectLayerByLocation(countries_layer, "INTERSECT", "in_memory\\point_features", selection_type="SUBSET_SELECTION")
+    # Project the selected countries to WGS 1984, unless the source already uses it
+    if arcpy.Describe(countries_layer).spatialReference.factoryCode == wgs84.factoryCode:
+        countries_projected = countries_layer
+    else:
+        countries_projected = "in_memory\\countries_projected"
+        arcpy.management.Project(countries_layer, countries_projected, wgs84)
     
     # Perform the first spatial join between the point features and the projected country polygons using "WITHIN" criteria
-    arcpy.analysis.SpatialJoin("in_memory\\point_features", "in_memory\\countries_projected", "in_memory\\point_country_join_first",
+    arcpy.analysis.SpatialJoin("in_memory\\point_features", countries_projected, "in_memory\\point_country_join_first",
                                 join_type="KEEP_ALL", match_option="WITHIN")
     
-    # Perform the second spatial join between the points with null country values and country polygons within a certain distance using "CLOSEST" criteria
-    arcpy.analysis.SpatialJoin("in_memory\\point_country_join_first", "in_memory\\eez_layer", "in_memory\\point_country_join_second",
+    # Perform the second spatial join between the point features and the EEZ polygons within a certain distance using "CLOSEST" criteria
+    arcpy.analysis.SpatialJoin("in_memory\\point_features", "in_memory\\eez_layer", "in_memory\\point_country_join_second",
                                 join_type="KEEP_ALL", match_option="CLOSEST", search_radius="2 Kilometers")
     
     # Add the Country and ISO fields to the original point features
     arcpy.management.AddFields("in_memory\\point_features", [("Country", "TEXT"),("ISO", "TEXT"),("OnSS_ID", "TEXT")])
 
-    # Determine the unique identifier field in the point features
-    point_features_fields = [f.name for f in arcpy.ListFields("in_memory\\point_features")]
-    unique_id_field = "OBJECTID" if "OBJECTID" in point_features_fields else arcpy.Describe("in_memory\\point_features").OIDFieldName
-    
-    # Update the "Country" and "ISO" fields from the first spatial join
-    with arcpy.da.UpdateCursor("in_memory\\point_country_join_first", [unique_id_field, "COUNTRY", "ISO_CC"]) as update_cursor_first:
-        country_iso_mapping_first = {row[0]: (row[1], row[2]) for row in update_cursor_first}
+    # Map the object ID of each point feature to the country and ISO values of the first spatial join
+    with arcpy.da.SearchCursor("in_memory\\point_country_join_first", ["TARGET_FID", "COUNTRY", "ISO_CC"]) as search_cursor_first:
+        country_iso_mapping_first = {row[0]: (row[1], row[2]) for row in search_cursor_first}
 
-    with arcpy.da.UpdateCursor("in_memory\\point_features", [unique_id_field, "Country", "ISO"]) as update_cursor:
+    # Update the "Country" and "ISO" fields from the first spatial join
+    with arcpy.da.UpdateCursor("in_memory\\point_features", ["OID@", "Country", "ISO"]) as update_cursor:
         for update_row in update_cursor:
             if update_row[0] in country_iso_mapping_first:
                 country_value, iso_cc_value = country_iso_mapping_first[update_row[0]]
@@ -78,11 +84,13 @@ def identify_countries(point_features):
                 update_row[2] = iso_cc_value if iso_cc_value else "Unknown"
                 update_cursor.updateRow(update_row)
 
-    # Update the "Country" and "ISO" fields from the second spatial join  
-    with arcpy.da.UpdateCursor("in_memory\\point_country_join_second", [unique_id_field, "TERRITORY1", "ISO_TER1"]) as update_cursor_second:
-        country_iso_mapping_second = {row[0]: (row[1], row[2]) for row in update_cursor_second}
+    # Map the object ID of each point feature to the territory and ISO values of the second spatial join
+    with arcpy.da.SearchCursor("in_memory\\point_country_join_second", ["TARGET_FID", "TERRITORY1", "ISO_TER1"]) as search_cursor_second:
+        country_iso_mapping_second = {row[0]: (row[1], row[2]) for row in search_cursor_second}
 
-    with arcpy.da.UpdateCursor("in_memory\\point_features", [unique_id_field, "Country", "ISO", "Type"]) as update_cursor:
+    # Update the "Country" and "ISO" fields from the second spatial join and number the remaining substations in the same pass
+    onss_id = 0
+    with arcpy.da.UpdateCursor("in_memory\\point_features", ["OID@", "Country", "ISO", "Type", "OnSS_ID"]) as update_cursor:
         for update_row in update_cursor:
             if update_row[0] in country_iso_mapping_second:
                 country_value, iso_cc_value = country_iso_mapping_second[update_row[0]]
@@ -90,18 +98,16 @@ def identify_countries(point_features):
                     if update_row[3] in ['Station', 'Substation', 'Sub_station'] and (country_value or iso_cc_value):
                         update_row[1] = country_value
                         update_row[2] = iso_mp.get(iso_cc_value, "Unknown")
-                        update_cursor.updateRow(update_row)
                     else:
                         update_cursor.deleteRow()
+                        continue
                 elif update_row[3] not in ['Station', 'Substation', 'Sub_station']:
                     update_cursor.deleteRow()
-                    
-    # Generate OnSS_ID for substations
-    onss_id = 0
-    with arcpy.da.UpdateCursor("in_memory\\point_features", ["OnSS_ID"]) as update_cursor:
-        for update_row in update_cursor:
+                    continue
+
+            # Generate OnSS_ID for substations
             onss_id += 1
-            update_row[0] = onss_id
+            update_row[4] = onss_id
             update_cursor.updateRow(update_row)
             
     # Copy features to in-memory
@@ -109,6 +115,82 @@ def identify_countries(point_features):
 
     return point_features
 
+def excel_to_parquet(excel_file: str) -> str:
+    """
+    Cache the required columns of the high-voltage vertices Excel file as a Parquet file
+    next to it so that later runs skip parsing the workbook.
+
+    Parameters:
+        excel_file (str): Path to the Excel file.
+
+    Returns:
+        str: Path to the Parquet file holding the lon, lat, typ, voltage and frequency columns.
+    """
+    parquet_file = os.path.splitext(excel_file)[0] + ".parquet"
+
+    # Convert the workbook only if the Parquet cache is missing or older than the workbook
+    if not os.path.exists(parquet_file) or os.path.getmtime(parquet_file) < os.path.getmtime(excel_file):
+        df = pd.read_excel(excel_file, usecols=['lon', 'lat', 'typ', 'voltage', 'frequency'],
+                           dtype={'typ': 'string', 'voltage': 'string', 'frequency': 'string'})
+        df.to_parquet(parquet_file, index=False)
+
+    return parquet_file
+
+def max_string_lengths(parquet: pq.ParquetFile, columns: list) -> dict:
+    """
+    Find the length of the longest string in each of the given Parquet columns, reading one batch at a time.
+
+    Parameters:
+        parquet (pq.ParquetFile): The Parquet file to scan.
+        columns (list): Names of the string columns.
+
+    Returns:
+        dict: Longest string length per column, at least 1 so empty columns still get a valid text width.
+    """
+    lengths = dict.fromkeys(columns, 1)
+    for batch in parquet.iter_batches(batch_size=50000, columns=columns):
+        for column in columns:
+            # Null values have no length and are skipped by the maximum
+            batch_max = pc.max(pc.utf8_length(batch.column(column))).as_py()
+            if batch_max is not None:
+                lengths[column] = max(lengths[column], batch_max)
+    return lengths
+
+def vertices_to_array(df: pd.DataFrame, widths: dict) -> np.ndarray:
+    """
+    Convert a chunk of high-voltage vertices to a structured array of stations and substations.
+
+    Parameters:
+        df (pd.DataFrame): Chunk with the lon, lat, typ, voltage and frequency columns.
+        widths (dict): Text widths of the typ, voltage and frequency columns.
+
+    Returns:
+        np.ndarray: Structured array holding the point geometry and the attributes of each vertex.
+    """
+    # Filter for station, substation, and sub_station types
+    df = df[df['typ'].str.lower().isin(['station', 'substation', 'sub_station'])]
+
+    # Build a structured array with the same text widths for every chunk, so no value is truncated
+    vertices = np.empty(len(df), dtype=[
+        ("XY", "<f8", 2),
+        ("Longitude", "<f8"),
+        ("Latitude", "<f8"),
+        ("Type", f"<U{widths['typ']}"),
+        ("Voltage", f"<U{widths['voltage']}"),
+        ("Frequency", f"<U{widths['frequency']}")
+    ])
+
+    # Fill the array column-wise, replacing null voltages and frequencies with empty strings
+    vertices["XY"][:, 0] = df['lon'].to_numpy()
+    vertices["XY"][:, 1] = df['lat'].to_numpy()
+    vertices["Longitude"] = vertices["XY"][:, 0]
+    vertices["Latitude"] = vertices["XY"][:, 1]
+    vertices["Type"] = df['typ'].str.capitalize().to_numpy(dtype=str)
+    vertices["Voltage"] = df['voltage'].fillna('').to_numpy(dtype=str)
+    vertices["Frequency"] = df['frequency'].fillna('').to_numpy(dtype=str)
+
+    return vertices
+
 def excel_to_shapefile(excel_file: str, highvoltage_vertices_folder: str) -> None:
     """
     Convert data from an Excel file to a shapefile.
@@ -117,54 +199,46 @@ def excel_to_shapefile(excel_file: str, highvoltage_vertices_folder: str) -> Non
         excel_file (str): Path to the Excel file.
         highvoltage_vertices_folder (str): Path to the output folder for the shapefile.
     """
+    # Allow geoprocessing tools to overwrite existing outputs
+    arcpy.env.overwriteOutput = True
+
     # Define the spatial reference for EPSG:4326 (WGS84)
     spatial_ref = arcpy.SpatialReference(4326)  
     start_time = time.time()
 
     arcpy.AddMessage("Reading Excel data...")
-    # Read Excel data using pandas
-    df = pd.read_excel(excel_file)
+    # Convert the Excel data to Parquet once, reusing the cache when it is up to date
+    parquet_file = excel_to_parquet(excel_file)
 
     # Generate a timestamp to include in the output shapefile name
     timestamp = datetime.now().strftime(f"%y%m%d_%H%M%S")
     output_shapefile_name = f"OnSS_BalticSea_{timestamp}.shp"
 
-    # Create a new shapefile to store the point features with EPSG:4326 spatial reference
+    # Size the text fields from the longest strings in the Parquet file
+    parquet = pq.ParquetFile(parquet_file)
+    widths = max_string_lengths(parquet, ['typ', 'voltage', 'frequency'])
+
+    # Create the new shapefile storing the point features with EPSG:4326 spatial reference, before any chunk is read
     output_shapefile = os.path.join(highvoltage_vertices_folder, output_shapefile_name)
-    
-    # Create the shapefile
     arcpy.management.CreateFeatureclass(highvoltage_vertices_folder, output_shapefile_name, "POINT", spatial_reference=spatial_ref)
+    arcpy.management.AddFields(output_shapefile, [
+        ["Longitude", "DOUBLE"],
+        ["Latitude", "DOUBLE"],
+        # Shapefile text fields hold at most 254 characters
+        ["Type", "TEXT", "", min(widths['typ'], 254)],
+        ["Voltage", "TEXT", "", min(widths['voltage'], 254)],
+        ["Frequency", "TEXT", "", min(widths['frequency'], 254)]
+    ])
+
+    # Stream the Parquet file in batches so only one chunk of vertices is held in memory at a time
+    for batch in parquet.iter_batches(batch_size=50000):
+        vertices = vertices_to_array(batch.to_pandas(), widths)
 
-    # Define fields to store attributes
-    fields = [
-        ("Longitude", "DOUBLE"),
-        ("Latitude", "DOUBLE"),
-        ("Type", "TEXT"),
-        ("Voltage", "TEXT"),
-        ("Frequency", "TEXT")
-    ]
-
-    # Add fields to the shapefile
-    arcpy.management.AddFields(output_shapefile, fields)
-
-    # Open an insert cursor to add features to the output shapefile
-    with arcpy.da.InsertCursor(output_shapefile, ["SHAPE@XY", "Longitude", "Latitude", "Type", "Voltage", "Frequency"]) as cursor:
-        for row in df.itertuples():
-            longitude, latitude = row.lon, row.lat
-            typ, voltage, frequency = row.typ.capitalize(), row.voltage, row.frequency
-
-            # Check if voltage is null
-            if pd.isnull(voltage):
-                voltage = ""
-
-            # Check if frequency is null
-            if pd.isnull(frequency):
-                frequency = ""
-
-            # Filter for station, substation, and sub_station types
-            if typ.lower() in ['station', 'substation', 'sub_station']:
-                # Insert the row with the geometry and attributes
-                cursor.insertRow([(longitude, latitude), longitude, latitude, typ, voltage, frequency])
+        # Append each chunk to the shapefile
+        if len(vertices) > 0:
+            arcpy.da.NumPyArrayToFeatureClass(vertices, "memory\\vertices_chunk", ("XY",), spatial_ref)
+            arcpy.management.Append("memory\\vertices_chunk", output_shapefile, "NO_TEST")
+            arcpy.management.Delete("memory\\vertices_chunk")
 
     arcpy.AddMessage("Identifying countries...")
     # Identify countries and add the country field to the point features
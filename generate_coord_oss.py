@@ -1,5 +1,8 @@
 import arcpy
 import os
+import numpy as np
+from scripts.polygon_rings import points_in_polygons
+from scripts.ice_cover import read_ice_polygons
 
 def generate_windfarm_coordinates(output_folder: str) -> None:
     """
@@ -43,41 +46,40 @@ def generate_windfarm_coordinates(output_folder: str) -> None:
     oss_name = "OSSC_BalticSea.shp"
     oss_layer = os.path.join(output_folder, oss_name)
 
-    # Create one output feature class for all wind farm connection point
-    arcpy.CreateFeatureclass_management(output_folder, oss_name, "POINT", spatial_reference=wgs84)
+    # Read the centroid of each feature in WGS 1984 in one call, so no geometry objects or rows are created
+    wfa_array = arcpy.da.FeatureClassToNumPyArray(wfa_layer, ["OID@", "SHAPE@XY", "country"],
+                                                  spatial_reference=wgs84, null_value={"country": ""})
 
-    # Add necessary fields to the output feature class
-    arcpy.AddFields_management(oss_layer, [
-        ["Country", "TEXT", "", 10],
-        ["ISO", "TEXT", "", "", 50, "Country"],
-        ["WF_ID", "DOUBLE"],
-        ["Longitude", "DOUBLE"],
-        ["Latitude", "DOUBLE"],
-    ])
+    # Tag the ice cover of each point directly when an ice layer is present, so the points are written once with all attributes
+    ic_layer = next((layer for layer in map.listLayers() if layer.name.startswith('Ice')), None)
+    in_ice = np.zeros(len(wfa_array), dtype=bool)
+    if ic_layer is not None:
+        ice_sr, ice_rings, ice_extents = read_ice_polygons(ic_layer)
+        ice_points = arcpy.da.FeatureClassToNumPyArray(wfa_layer, ["SHAPE@XY"], spatial_reference=ice_sr)["SHAPE@XY"]
+        in_ice = points_in_polygons(ice_points.reshape(-1, 2), ice_rings, ice_extents)
 
-    # Prepare to insert new connection point features
-    insert_cursor_fields = ["SHAPE@", "Country", "ISO", "WF_ID", "Longitude", "Latitude"]
-    insert_cursor = arcpy.da.InsertCursor(oss_layer, insert_cursor_fields)
+    # Collect all connection points in a structured array with the output schema
+    oss_array = np.empty(len(wfa_array), dtype=[
+        ("XY", "<f8", 2),
+        ("Country", "U10"),
+        ("ISO", "U10"),
+        ("WF_ID", "<f8"),
+        ("Longitude", "<f8"),
+        ("Latitude", "<f8"),
+        ("IceCover", "U5")
+    ])
+    oss_array["XY"] = wfa_array["SHAPE@XY"]
+    oss_array["Country"] = wfa_array["country"]
+    # Get the ISO code for each country from the dictionary
+    oss_array["ISO"] = [iso_mp.get(country, "") for country in wfa_array["country"].tolist()]
+    oss_array["WF_ID"] = wfa_array["OID@"] + 1
+    oss_array["Longitude"] = wfa_array["SHAPE@XY"][:, 0]
+    oss_array["Latitude"] = wfa_array["SHAPE@XY"][:, 1]
+    oss_array["IceCover"] = np.where(in_ice, "Yes", "No")
 
-    # Iterate through each feature in the input layer
-    search_fields = ["SHAPE@", "OID@", "country"]  # We only need the geometry and object ID
-    with arcpy.da.SearchCursor(wfa_layer, search_fields) as feature_cursor:
-        for shape, farm_id, country in feature_cursor:
-            # Calculate the midpoint of the feature
-            midpoint = shape.centroid
-            
-            # Get the ISO code for the country from the dictionary
-            iso_code = iso_mp.get(country, None)
-            
-            # Extract longitude and latitude from the midpoint
-            longitude, latitude = midpoint.X, midpoint.Y
-            
-            # Insert the new connection point with its attributes
-            farm_id += 1
-            row_values = (midpoint, country, iso_code, farm_id, longitude, latitude)
-            insert_cursor.insertRow(row_values)
+    # Write all connection points to the output feature class in one bulk call
+    arcpy.da.NumPyArrayToFeatureClass(oss_array, oss_layer, ("XY",), wgs84)
 
-    
     # Add the generated shapefile to the current map
     map.addDataFromPath(oss_layer)
 
@@ -1,61 +1,142 @@
 import arcpy
 import os
+import json
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from scripts.layer_cache import is_cache_fresh, mark_cached
+
+def fetch_json(url: str, params: dict) -> dict:
+    """
+    Send a GET request to an ArcGIS REST endpoint and return the decoded JSON response.
+
+    Parameters:
+        url (str): The REST endpoint URL.
+        params (dict): The query parameters of the request.
+
+    Returns:
+        dict: The decoded JSON response.
+    """
+    with urllib.request.urlopen(f"{url}?{urllib.parse.urlencode(params)}") as response:
+        return json.loads(response.read().decode("utf-8"))
+
+def query_feature_service(feature_service_url: str, where_clause: str, output_fc: str, out_fields: list = None, out_sr: int = None, max_workers: int = 8) -> int:
+    """
+    Query a feature service in pages of maxRecordCount features and merge the pages into a single feature class.
+    The pages are requested in parallel threads, so results are never silently truncated at the service's
+    maxRecordCount.
+
+    Parameters:
+        feature_service_url (str): The URL of the feature service layer.
+        where_clause (str): The SQL where clause selecting the features.
+        output_fc (str): The feature class where the merged features will be saved.
+        out_fields (list): The fields to return. If None, all fields are returned.
+        out_sr (int): The WKID the service should project the geometries to. If None, the service's own spatial reference is used.
+        max_workers (int): The maximum number of parallel page requests.
+
+    Returns:
+        int: The number of features matching the where clause.
+    """
+    query_url = f"{feature_service_url}/query"
+
+    # Count the matching features and read the page size of the service in parallel
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        count_future = executor.submit(fetch_json, query_url, {"where": where_clause, "returnCountOnly": "true", "f": "json"})
+        layer_info_future = executor.submit(fetch_json, feature_service_url, {"f": "json"})
+        count = count_future.result()["count"]
+        layer_info = layer_info_future.result()
+    if count == 0:
+        return 0
+    max_record_count = layer_info.get("maxRecordCount", 1000)
+    oid_field = layer_info.get("objectIdField", "OBJECTID")
+
+    page_params = {
+        "where": where_clause,
+        "outFields": ",".join(out_fields) if out_fields else "*",
+        "orderByFields": oid_field,
+        "resultRecordCount": max_record_count,
+        "f": "json"
+    }
+    # Let the service project the geometries
+    if out_sr is not None:
+        page_params["outSR"] = out_sr
+
+    def fetch_page(offset):
+        return fetch_json(query_url, {**page_params, "resultOffset": offset})
+
+    # Request all pages in parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pages = list(executor.map(fetch_page, range(0, count, max_record_count)))
+
+    # Write the first page to the output feature class and append the other pages as feature sets,
+    # without materializing every page as an intermediate feature class
+    arcpy.management.CopyFeatures(arcpy.AsShape(pages[0], True), output_fc)
+    for page in pages[1:]:
+        arcpy.management.Append(arcpy.AsShape(page, True), output_fc, "NO_TEST")
+
+    return count
 
 def process_feature_service(output_folder: str, country_name: str = None) -> None:
     """
-    Process the feature service by selecting features based on the specified country,
-    convert them to point features, project to WGS 1984, and save the output as a shapefile.
+    Process the feature service by selecting the port features based on the specified country
+    in WGS 1984, and save the output as a shapefile.
     Additionally, adds a PortID field combining the country code and a counter.
 
     Parameters:
         output_folder (str): The folder where the output shapefile will be saved.
-        country_name (str): The name of the country to select features for. If None, process all Baltic Sea countries.
+        country_name (str): The country code, or semicolon-separated country codes, to select features for. If None, process all Baltic Sea countries.
 
     Returns:
         None
     """
+    # Allow geoprocessing tools to overwrite existing outputs
+    arcpy.env.overwriteOutput = True
     
     # Feature service URL
     feature_service_url = "https://services.arcgis.com/hRUr1F8lE8Jq2uJo/ArcGIS/rest/services/World_Port_Index/FeatureServer/0"
 
     # WGS 1984 WKID
-    wgs84 = arcpy.SpatialReference(4326)  # WGS 1984
-
-    # Create a feature layer from the feature service
-    feature_layer = arcpy.management.MakeFeatureLayer(feature_service_url, "World_Port_Index").getOutput(0)
+    wgs84 = 4326  # WGS 1984
 
     # Define ISO codes for Baltic Sea countries in alphabetical order
     baltic_sea_countries = ["DE", "DK", "EE", "FI", "LV", "LT", "PL", "SE"]
     
-    # If no country name is provided, process all Baltic Sea countries
+    # If no country name is provided, process all Baltic Sea countries, multiple countries are separated by semicolons
     if not country_name:
         countries_to_process = baltic_sea_countries
     else:
-        countries_to_process = [country_name]
-
-    # Select features based on the country codes of all Baltic Sea countries
-    query = "COUNTRY IN ('" + "','".join(countries_to_process) + "')"
-    arcpy.management.SelectLayerByAttribute(feature_layer, "NEW_SELECTION", query)
+        countries_to_process = [country.strip() for country in country_name.split(";") if country.strip()]
+
+    # Fields to keep in the output shapefile
+    fields_to_keep = ["INDEX_NO", "REGION_NO", "PORT_NAME", "COUNTRY", "LATITUDE", "LONGITUDE", "HARBORSIZE", "HARBORTYPE"]
+
+    # Query only the fields to keep of all Baltic Sea countries from the feature service in parallel pages,
+    # keeping the result in the scratch geodatabase so later runs for the same countries skip the download
+    cache_name = "Ports_" + "_".join(sorted(countries_to_process))
+    cached_ports = os.path.join(arcpy.env.scratchGDB, cache_name)
+    # Let the geoprocessing tools that support it use all available cores, only while the ports are fetched
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        if is_cache_fresh(cache_name):
+            count = int(arcpy.management.GetCount(cached_ports).getOutput(0))
+            arcpy.management.CopyFeatures(cached_ports, "memory\\BalticSea_Ports")
+        else:
+            query = "COUNTRY IN ('" + "','".join(countries_to_process) + "')"
+            count = query_feature_service(feature_service_url, query, "memory\\BalticSea_Ports", fields_to_keep, out_sr=wgs84)
+            # Cache the ports only once every page has been fetched, so a failed download is never reused
+            if count > 0:
+                arcpy.management.CopyFeatures("memory\\BalticSea_Ports", cached_ports)
+                mark_cached(cache_name)
 
     # Check if any features were selected
-    result = arcpy.management.GetCount(feature_layer)
-    count = int(result.getOutput(0))
-
     if count > 0:
-        # Convert the feature layer to a point feature layer
-        arcpy.management.FeatureToPoint(feature_layer, "in_memory\\BalticSea_Points", "INSIDE")
-
-        # Project the point feature layer to WGS 1984
-        arcpy.management.Project("in_memory\\BalticSea_Points", "in_memory\\BalticSea_Points_Projected", wgs84)
-
         # Add a new PortID field combining country code and a counter
-        arcpy.management.AddField("in_memory\\BalticSea_Points_Projected", "PortID", "TEXT", field_length=10)
+        arcpy.management.AddField("memory\\BalticSea_Ports", "PortID", "TEXT", field_length=10)
         
         # Initialize a counter for each country
         counter_dict = {country: 1 for country in countries_to_process}
 
         # Calculate the PortID field value for each feature
-        with arcpy.da.UpdateCursor("in_memory\\BalticSea_Points_Projected", ["COUNTRY", "PortID"]) as cursor:
+        with arcpy.da.UpdateCursor("memory\\BalticSea_Ports", ["COUNTRY", "PortID"]) as cursor:
             for row in cursor:
                 country_code = row[0]
                 row[1] = f"{country_code}_{counter_dict[country_code]}"
@@ -65,13 +146,18 @@ def process_feature_service(output_folder: str, country_name: str = None) -> Non
         # Create a new shapefile in the output folder
         output_shapefile = os.path.join(output_folder, "BalticSea_SelectedPorts.shp")
 
-        # Save the projected point features from the in-memory workspace to the specified output shapefile.
-        arcpy.management.CopyFeatures("in_memory\\BalticSea_Points_Projected", output_shapefile)
+        # Map only the necessary fields to the output shapefile
+        field_mappings = arcpy.FieldMappings()
+        for field in fields_to_keep + ["PortID"]:
+            field_map = arcpy.FieldMap()
+            field_map.addInputField("memory\\BalticSea_Ports", field)
+            field_mappings.addFieldMap(field_map)
+
+        # Save the port features from the memory workspace to the specified output shapefile in a single write
+        arcpy.conversion.ExportFeatures("memory\\BalticSea_Ports", output_shapefile, field_mapping=field_mappings)
 
-        # Delete unnecessary fields in the output shapefile
-        fields_to_keep = ["FID", "INDEX_NO", "REGION_NO", "PORT_NAME", "COUNTRY", "LATITUDE", "LONGITUDE", "HARBORSIZE", "HARBORTYPE", "PortID"]
-        fields_to_delete = [field.name for field in arcpy.ListFields(output_shapefile) if field.name not in fields_to_keep and not field.required]
-        arcpy.management.DeleteField(output_shapefile, fields_to_delete)
+        # Clear the intermediate features from the memory workspace
+        arcpy.management.Delete("memory")
         
         # Use arcpy.mp to add the layer to the map
         aprx = arcpy.mp.ArcGISProject("CURRENT")
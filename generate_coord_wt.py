@@ -1,6 +1,13 @@
 import arcpy
 import os
+import sys
+import multiprocessing
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from scripts.polygon_rings import get_rings
+from scripts.projection import project_points, get_spatial_reference, get_utm_wkid
+from scripts.turbine_grid import generate_turbine_points
 
 def create_wind_turbine_shapefile(output_folder: str) -> None:
     """
@@ -18,9 +25,8 @@ def create_wind_turbine_shapefile(output_folder: str) -> None:
     turbine_diameter = 240 # m
     turbine_spacing = 6 # turbine diameters
     
-    # Set the spatial reference to a UTM Zone using its Well-Known ID (WKID)
-    utm33 = arcpy.SpatialReference(32633)  # Example: UTM Zone 33N
-    wgs84 = arcpy.SpatialReference(4326)
+    # Set the geographic spatial reference, the UTM zone is determined per feature
+    wgs84 = get_spatial_reference(4326)
     
     # Define a dictionary mapping country names to their corresponding two-letter country codes
     iso_mp = {
@@ -58,9 +64,6 @@ def create_wind_turbine_shapefile(output_folder: str) -> None:
     wtc_name = wfa_layer.name.replace('WFA', 'WTC') + ".shp"
     wtc_layer = os.path.join(output_folder, wtc_name)
 
-    # Reproject input_layer to UTM
-    wfa_layer = arcpy.management.Project(wfa_layer, os.path.join("in_memory\\input_layer"), utm33)[0]
-    
     # Create one output feature class for all turbine points
     arcpy.CreateFeatureclass_management(output_folder, wtc_name, "POINT", spatial_reference=wgs84)
 
@@ -79,73 +82,73 @@ def create_wind_turbine_shapefile(output_folder: str) -> None:
     ])
 
     # Prepare to insert new turbine point features
-    insert_cursor_fields = ["SHAPE@", "Country", "ISO", "Name", "WF_ID", "WT_ID",  "Status", "Longitude", "Latitude", "Capacity", "Diameter"]
-    insert_cursor = arcpy.da.InsertCursor(wtc_layer, insert_cursor_fields)
-    wt_id = 0
+    insert_cursor_fields = ["SHAPE@XY", "Country", "ISO", "Name", "WF_ID", "WT_ID",  "Status", "Longitude", "Latitude", "Capacity", "Diameter"]
     
     # Calculate the spacing in meters
     spacing = turbine_spacing * turbine_diameter
         
-    # Generate points within the bounding box of the input layer's extent
-    # considering the specified spacing using NumPy
+    # Read the features and project each one to the UTM zone of its centroid
+    features = []
     search_fields = ["SHAPE@", "OID@", "Country", "Name", "Status"]
     with arcpy.da.SearchCursor(wfa_layer, search_fields) as feature_cursor:
-        for row, (shape, wf_id, country, name, status) in enumerate(feature_cursor):
-            extent = shape.extent
-
-            # Calculate number of points in x and y directions
-            num_points_x = int((extent.width / (spacing)) + 1)
-            num_points_y = int((extent.height / (spacing)) + 1)
-
-            # Generate points within the extent directly
-            x_coords = np.linspace(extent.XMin, extent.XMax, num_points_x)
-            y_coords = np.linspace(extent.YMin, extent.YMax, num_points_y)
-
-            # Create grid of x and y coordinates using meshgrid
-            xx, yy = np.meshgrid(x_coords, y_coords)
-
-            # Flatten the grid to create a 2D array of points
-            points = np.column_stack((xx.flatten(), yy.flatten()))
-
-            # Create point geometries for all points
-            point_geometries = [arcpy.PointGeometry(arcpy.Point(*point), utm33) for point in points]
-
-            # Check containment of all points using vectorized operation
-            contains_mask = np.array([shape.contains(pt.centroid) for pt in point_geometries])
-
-            # Filter points using the containment mask
-            contained_points = points[contains_mask]
-
-            # Project the contained points to WGS 1984 spatial reference
-            projected_points = [arcpy.PointGeometry(arcpy.Point(*point), utm33).projectAs(wgs84) for point in contained_points]
-            
-            # Create rows to insert into feature class
-            rows = []
+        for shape, wf_id, country, name, status in feature_cursor:
+            # Project only the centroid to WGS 1984 to determine the zone, the feature itself is projected once
+            centroid = arcpy.PointGeometry(shape.centroid, shape.spatialReference).projectAs(wgs84).firstPoint
+            utm_sr = get_spatial_reference(get_utm_wkid(centroid.X, centroid.Y))
+            features.append((get_rings(shape.projectAs(utm_sr)), utm_sr, wf_id, country, name, status))
+
+    # Estimate the number of candidate grid points from the extent of each feature
+    candidate_points = sum(np.prod(np.ptp(np.vstack(feature[0]), axis=0) / spacing + 1) for feature in features if feature[0])
+
+    # Starting a worker process costs more than generating a few grids, so only use a pool for many features and points
+    max_workers = min(len(features), os.cpu_count() or 1)
+    if max_workers < 4 or candidate_points < 1e6:
+        turbine_points = [generate_turbine_points(feature[0], spacing) for feature in features]
+    else:
+        # Generate the turbine grids in parallel worker processes. Inside ArcGIS Pro the running executable
+        # is the application itself, so start the workers with its Python interpreter instead
+        if not os.path.basename(sys.executable).lower().startswith("python"):
+            multiprocessing.set_executable(os.path.join(sys.exec_prefix, "python.exe" if os.name == "nt" else "bin/python"))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            turbine_points = list(executor.map(generate_turbine_points, [feature[0] for feature in features], repeat(spacing)))
+
+    # Group the features by UTM zone and project the turbines of each zone to WGS 1984 in one call
+    projected_turbine_points = [None] * len(features)
+    zones = {}
+    for i, feature in enumerate(features):
+        zones.setdefault(feature[1].factoryCode, []).append(i)
+    # Let the bulk projection use all available cores, only for the duration of these calls
+    with arcpy.EnvManager(parallelProcessingFactor="100%"):
+        for indices in zones.values():
+            zone_points = np.vstack([turbine_points[i] for i in indices])
+            projected_zone_points = project_points(zone_points, features[indices[0]][1], wgs84)
+            split_points = np.split(projected_zone_points, np.cumsum([len(turbine_points[i]) for i in indices])[:-1])
+            for i, projected_points in zip(indices, split_points):
+                projected_turbine_points[i] = projected_points
+
+    # Insert the turbines of all features through one insert cursor
+    with arcpy.da.InsertCursor(wtc_layer, insert_cursor_fields) as insert_cursor:
+        for (_, _, wf_id, country, name, status), projected_points in zip(features, projected_turbine_points):
+            # Get the ISO code of the country, default to "XX" if country code is not found
+            iso = iso_mp.get(country, "XX")
+
+            # Insert the rows directly into the feature class
             wt_id = 0
-            for point in projected_points:
-                iso = iso_mp.get(country, "XX")  # Default to "XX" if country code is not found
+            for lon, lat in projected_points:
                 wt_id += 1
-                rows.append((
-                    point,
+                insert_cursor.insertRow((
+                    (lon, lat),
                     country,
                     iso,
                     name,
                     wf_id,
                     wt_id,
                     status,
-                    round(point.centroid.X, 6),
-                    round(point.centroid.Y, 6),
+                    round(lon, 6),
+                    round(lat, 6),
                     turbine_capacity,
                     turbine_diameter
                 ))
-
-            # Insert rows in batches of 100
-            batch_size = 100
-            for i in range(0, len(rows), batch_size):
-                
-                batch_rows = rows[i:i + batch_size]
-                for row in batch_rows:
-                    insert_cursor.insertRow(row)
             
     # Add the generated shapefile to the current map
     map.addDataFromPath(wtc_layer)
@@ -1,20 +1,20 @@
 import arcpy
 import networkx as nx
 import os
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, sin, cos, sqrt, asin
 
 def haversine(lat1, lon1, lat2, lon2):
     """
     Calculate the great-circle distance between two points on the Earth surface.
     """
     # Convert latitude and longitude from degrees to radians
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    lat1, lat2 = radians(lat1), radians(lat2)
 
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    # Haversine formula, squaring by multiplication and without building intermediate lists
+    sin_dlat = sin((lat2 - lat1) / 2)
+    sin_dlon = sin(radians(lon2 - lon1) / 2)
+    a = sin_dlat * sin_dlat + cos(lat1) * cos(lat2) * sin_dlon * sin_dlon
+    c = 2 * asin(min(1.0, sqrt(a)))
     r = 6371 * 1e3 # Radius of Earth in meters
     distance = r * c  
 
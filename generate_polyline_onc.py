@@ -47,11 +47,9 @@ def excel_to_polyline_shapefile(excel_file: str, output_folder: str) -> None:
 
     # Create a new shapefile to store the polyline features with EPSG:4326 spatial reference
     temp_shapefile = os.path.join(output_folder, "Temp_HighVoltage_Links.shp")
-    # Check if the shapefile already exists, delete it if it does
-    if arcpy.Exists(temp_shapefile):
-        arcpy.Delete_management(temp_shapefile)
-    # Create the shapefile
-    arcpy.management.CreateFeatureclass(output_folder, "Temp_HighVoltage_Links.shp", "POLYLINE", spatial_reference=spatial_ref)
+    # Create the shapefile, replacing an earlier output
+    with arcpy.EnvManager(overwriteOutput=True):
+        arcpy.management.CreateFeatureclass(output_folder, "Temp_HighVoltage_Links.shp", "POLYLINE", spatial_reference=spatial_ref)
 
     # Define fields to store attributes
     fields = [
@@ -87,19 +85,18 @@ def excel_to_polyline_shapefile(excel_file: str, output_folder: str) -> None:
 
     # Create an output shapefile for the spatial join result
     output_shapefile = os.path.join(output_folder, "HighVoltage_Links.shp")
-    if arcpy.Exists(output_shapefile):
-        arcpy.Delete_management(output_shapefile)
-
-    # Perform spatial join to filter polylines within 50 km of any onshore substation point
-    arcpy.analysis.SpatialJoin(
-        target_features=temp_shapefile,
-        join_features=onss_layer,
-        out_feature_class=output_shapefile,
-        join_type="KEEP_COMMON",
-        match_option="WITHIN_A_DISTANCE",
-        search_radius="25 Kilometers",
-        distance_field_name="DISTANCE"
-    )
+
+    # Perform spatial join to filter polylines within 50 km of any onshore substation point, replacing an earlier output
+    with arcpy.EnvManager(overwriteOutput=True):
+        arcpy.analysis.SpatialJoin(
+            target_features=temp_shapefile,
+            join_features=onss_layer,
+            out_feature_class=output_shapefile,
+            join_type="KEEP_COMMON",
+            match_option="WITHIN_A_DISTANCE",
+            search_radius="25 Kilometers",
+            distance_field_name="DISTANCE"
+        )
 
     arcpy.AddMessage("Adding shapefile to the map...")
     # Add the shapefile to the map
@@ -1,4 +1,7 @@
 import arcpy
+import numpy as np
+from scripts.polygon_rings import points_in_polygons
+from scripts.ice_cover import read_ice_polygons
 
 def identify_icecover() -> None:
     """
@@ -36,25 +39,31 @@ def identify_icecover() -> None:
     
     arcpy.AddMessage(f"Processing layer: {wt_layer.name}")
 
-    # Check if the "IceCover" field already exists
-    field_names = [field.name for field in arcpy.ListFields(wt_layer)]
-    if "IceCover" not in field_names:
-        # Add new field to store ice cover information
-        for layer in [wt_layer, oss_layer, eh_layer]:
+    # Check per layer if the "IceCover" field already exists, the connection points may already carry it
+    for layer in [wt_layer, oss_layer, eh_layer]:
+        field_names = [field.name for field in arcpy.ListFields(layer)]
+        if "IceCover" not in field_names:
+            # Add new field to store ice cover information
             arcpy.AddField_management(layer, "IceCover", "TEXT", field_length = 5)
 
-    for layer in [wt_layer, oss_layer, eh_layer]:
-        # Set "IceCover" field to "No" for all features
-        arcpy.CalculateField_management(layer, "IceCover", "'No'", "PYTHON3")
+    # Read the ice polygons once together with their bounding boxes
+    ice_sr, ice_rings, ice_extents = read_ice_polygons(ic_layer)
 
-        # Select points within the ice polygon
-        arcpy.SelectLayerByLocation_management(layer, "WITHIN", ic_layer)
+    for layer in [wt_layer, oss_layer, eh_layer]:
+        # Read the point coordinates in the spatial reference of the ice polygons
+        with arcpy.da.SearchCursor(layer, ["OID@", "SHAPE@XY"], spatial_reference=ice_sr) as cursor:
+            rows = list(cursor)
+        points = np.array([xy for _, xy in rows], dtype=float).reshape(-1, 2)
 
-        # Update the "IceCover" field for selected points
-        arcpy.CalculateField_management(layer, "IceCover", "'Yes'", "PYTHON3")
+        # Map each point to its ice cover value
+        in_ice = points_in_polygons(points, ice_rings, ice_extents)
+        ice_cover = {oid: "Yes" if inside else "No" for (oid, _), inside in zip(rows, in_ice)}
 
-        # Clear selection
-        arcpy.SelectLayerByAttribute_management(layer, "CLEAR_SELECTION")
+        # Write the "IceCover" field in one pass over the layer
+        with arcpy.da.UpdateCursor(layer, ["OID@", "IceCover"]) as cursor:
+            for row in cursor:
+                row[1] = ice_cover.get(row[0], "No")
+                cursor.updateRow(row)
 
     arcpy.AddMessage("Process completed successfully.")
 
@@ -42,7 +42,9 @@ import numpy as np
 import os
 import pandas as pd
 import openpyxl
-from itertools import product
+from collections import defaultdict
+import math
+from numba import njit, prange
 from scripts.present_value import present_value_single
 from scripts.eh_cost import check_supp, equip_cost_lin, inst_deco_cost_lin
 
@@ -266,80 +268,150 @@ def wf_cost_lin(wf_cost, wf_total_cap, wf_cap):
     """
     return value(wf_cost) * (wf_cap / wf_total_cap)
 
-def haversine(lon1, lat1, lon2, lat2):
+@njit(cache=True, fastmath=True)
+def haversine_term(lon1, lat1, lon2, lat2):
     """
-    Calculate the great-circle distance between two points in kilometers
-    on the Earth (specified in decimal degrees) using NumPy for calculations.
+    Calculate the squared half-chord term of the haversine formula between two points
+    on the Earth (specified in decimal degrees). It increases monotonically with the distance.
     """
     # Convert decimal degrees to radians
-    lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
+    lon1, lat1, lon2, lat2 = math.radians(lon1), math.radians(lat1), math.radians(lon2), math.radians(lat2)
 
     # Haversine formula
     dlon = lon2 - lon1
     dlat = lat2 - lat1
-    a = np.sin(dlat/2.0)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2.0)**2
-    c = 2 * np.arcsin(np.sqrt(a))
+    sin_dlat = math.sin(dlat / 2.0)
+    sin_dlon = math.sin(dlon / 2.0)
+    return sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon
+
+@njit(parallel=True, cache=True, fastmath=True)
+def haversine_matrix(lon1, lat1, lon2, lat2, max_term):
+    """
+    Calculate the great-circle distances in kilometers between all points of two groups
+    of coordinates (specified in decimal degrees as 1-D arrays).
+    Pairs with a haversine term above max_term are set to infinity without taking the square root and arcsine.
+    """
     r = 6371  # Radius of Earth in kilometers
-    return c * r
+    distances = np.empty((lon1.shape[0], lon2.shape[0]))
+    # Rows are independent, so they are distributed over the threads
+    for i in prange(lon1.shape[0]):
+        for j in range(lon2.shape[0]):
+            a = haversine_term(lon1[i], lat1[i], lon2[j], lat2[j])
+            if a <= max_term:
+                distances[i, j] = 2 * r * math.asin(min(1.0, math.sqrt(a)))
+            else:
+                distances[i, j] = np.inf
+    return distances
 
-def find_viable_ec1(wf_lon, wf_lat, eh_lon, eh_lat):
+def distance_matrix(df1, df2, max_distance=np.inf):
     """
-    Find all pairs of offshore wind farms and energy hubs within 150km,
-    ensuring that they belong to the same country based on their ISO codes.
+    Calculate the great-circle distances between two groups of points.
+
+    Parameters:
+    - df1 (pd.DataFrame): First group indexed by ID, with 'lon' and 'lat' columns.
+    - df2 (pd.DataFrame): Second group indexed by ID, with 'lon' and 'lat' columns.
+    - max_distance (float): Distances above this limit in kilometers are returned as infinity.
+
+    Returns:
+    - ids1 (np.ndarray): IDs of the first group, in row order.
+    - ids2 (np.ndarray): IDs of the second group, in column order.
+    - distances (np.ndarray): Distance matrix in kilometers with shape (len(ids1), len(ids2)).
+    """
+    # Read the IDs and coordinates straight from the columns of the tables
+    ids1 = df1.index.to_numpy(dtype=int)
+    ids2 = df2.index.to_numpy(dtype=int)
+    lon1_arr, lat1_arr = df1['lon'].to_numpy(dtype=float), df1['lat'].to_numpy(dtype=float)
+    lon2_arr, lat2_arr = df2['lon'].to_numpy(dtype=float), df2['lat'].to_numpy(dtype=float)
+
+    # Translate the distance limit to the haversine term once, so pairs beyond it are rejected by a comparison
+    r = 6371  # Radius of Earth in kilometers
+    max_term = math.sin(max_distance / (2 * r)) ** 2 if max_distance < math.pi * r else 1.0
+
+    # Evaluate all pairs in the compiled kernel
+    distances = haversine_matrix(lon1_arr, lat1_arr, lon2_arr, lat2_arr, max_term)
+    return ids1, ids2, distances
+
+def pair_distances(pairs, distances, pos1, pos2):
+    """
+    Gather the distances of a list of connections from a distance matrix.
+    
+    Parameters:
+    - pairs (list): Connections as (id1, id2) tuples.
+    - distances (np.ndarray): Distance matrix with rows and columns in ID order.
+    - pos1 (dict): Row position of each ID of the first group.
+    - pos2 (dict): Column position of each ID of the second group.
     
-    Parameters are dictionaries indexed by IDs with longitude, latitude, and ISO codes.
+    Returns:
+    - np.ndarray: Distances of the connections in the order of pairs.
     """
-    connections = []
-    for wf_id, eh_id in product(wf_lon.keys(), eh_lon.keys()):
-        # Calculate the distance first to see if they are within the viable range
-        distance = haversine(wf_lon[wf_id], wf_lat[wf_id], eh_lon[eh_id], eh_lat[eh_id])
-        if distance <= 250:  # Check if the distance is within 150 km
-            connections.append((int(wf_id), int(eh_id)))
-    return connections
+    rows = np.fromiter((pos1[id1] for id1, _ in pairs), dtype=int, count=len(pairs))
+    cols = np.fromiter((pos2[id2] for _, id2 in pairs), dtype=int, count=len(pairs))
+    return distances[rows, cols]
 
-def find_viable_ec2(eh_lon, eh_lat, onss_lon, onss_lat):
+def find_viable_ec1(wf_ids, eh_ids, distances):
     """
-    Find all pairs of offshore and onshore substations within 300km,
-    ensuring that they belong to the same country based on their ISO codes.
+    Find all pairs of offshore wind farms and energy hubs within 250km.
     
-    Parameters are dictionaries indexed by substation IDs with longitude, latitude, and ISO codes.
+    Parameters:
+    - wf_ids (np.ndarray): Wind farm IDs in the row order of the distance matrix.
+    - eh_ids (np.ndarray): Energy hub IDs in the column order of the distance matrix.
+    - distances (np.ndarray): Distance matrix between wind farms and energy hubs in kilometers.
     """
-    connections = []
-    for eh_id, onss_id in product(eh_lon.keys(), onss_lon.keys()):
-        # Calculate the distance first to see if they are within the viable range
-        distance = haversine(eh_lon[eh_id], eh_lat[eh_id], onss_lon[onss_id], onss_lat[onss_id])
-        if distance <= 250:  # Check if the distance is within 300 km
-            connections.append((int(eh_id), int(onss_id)))
-    return connections
+    # Keep the pairs within the viable range
+    rows, cols = np.nonzero(distances <= 250)
+    return list(zip(wf_ids[rows].tolist(), eh_ids[cols].tolist()))
 
-def find_viable_ec3(wf_lon, wf_lat, onss_lon, onss_lat):
+def find_viable_ec2(eh_ids, onss_ids, distances, eh_iso, onss_iso):
     """
-    Find all pairs of wind farms and onshore substations within 450km,
+    Find all pairs of offshore and onshore substations within 250km,
     ensuring that they belong to the same country based on their ISO codes.
     
-    Parameters are dictionaries indexed by IDs with longitude, latitude, and ISO codes.
+    Parameters:
+    - eh_ids (np.ndarray): Energy hub IDs in the row order of the distance matrix.
+    - onss_ids (np.ndarray): Onshore substation IDs in the column order of the distance matrix.
+    - distances (np.ndarray): Distance matrix between energy hubs and onshore substations in kilometers.
+    - eh_iso (dict): Dictionary of energy hub ISO codes indexed by ID.
+    - onss_iso (dict): Dictionary of onshore substation ISO codes indexed by ID.
+    """
+    # Energy hubs only export to onshore substations of their own country
+    same_country = np.array([eh_iso[eh] for eh in eh_ids.tolist()])[:, None] == np.array([onss_iso[onss] for onss in onss_ids.tolist()])[None, :]
+    
+    # Keep the pairs within the viable range
+    rows, cols = np.nonzero((distances <= 250) & same_country)
+    return list(zip(eh_ids[rows].tolist(), onss_ids[cols].tolist()))
+
+def find_viable_ec3(wf_ids, onss_ids, distances):
+    """
+    Find all pairs of wind farms and onshore substations within 500km.
+    
+    Parameters:
+    - wf_ids (np.ndarray): Wind farm IDs in the row order of the distance matrix.
+    - onss_ids (np.ndarray): Onshore substation IDs in the column order of the distance matrix.
+    - distances (np.ndarray): Distance matrix between wind farms and onshore substations in kilometers.
     """
-    connections = []
-    for wf_id, onss_id in product(wf_lon.keys(), onss_lon.keys()):
-        distance = haversine(wf_lon[wf_id], wf_lat[wf_id], onss_lon[onss_id], onss_lat[onss_id])
-        if distance <= 500:  # Check if the distance is within 450 km
-            connections.append((int(wf_id), int(onss_id)))
-    return connections
+    # Keep the pairs within the viable range
+    rows, cols = np.nonzero(distances <= 500)
+    return list(zip(wf_ids[rows].tolist(), onss_ids[cols].tolist()))
 
-def find_viable_onc(onss_lon, onss_lat):
+def find_viable_onc(onss_ids, distances, onss_iso):
     """
-    Find all pairs of onshore substations within 100km,
+    Find all pairs of onshore substations within 250km,
     ensuring that they belong to the same country based on their ISO codes.
     
-    Parameters are dictionaries indexed by IDs with longitude, latitude, and ISO codes.
+    Parameters:
+    - onss_ids (np.ndarray): Onshore substation IDs in the row and column order of the distance matrix.
+    - distances (np.ndarray): Distance matrix between onshore substations in kilometers.
+    - onss_iso (dict): Dictionary of onshore substation ISO codes indexed by ID.
     """
-    connections = []
-    for onss_id1, onss_id2 in product(onss_lon.keys(), repeat=2):
-        if onss_id1 != onss_id2:  # Prevent self-connections
-            distance = haversine(onss_lon[onss_id1], onss_lat[onss_id1], onss_lon[onss_id2], onss_lat[onss_id2])
-            if distance <= 250:  # Check if the distance is within 100 km
-                connections.append((int(onss_id1), int(onss_id2)))
-    return connections
+    # Onshore cables only distribute capacity between substations of the same country
+    onss_iso_arr = np.array([onss_iso[onss] for onss in onss_ids.tolist()])
+    same_country = onss_iso_arr[:, None] == onss_iso_arr[None, :]
+    
+    # Keep the pairs within the viable range and prevent self-connections
+    viable = (distances <= 250) & same_country
+    np.fill_diagonal(viable, False)
+    rows, cols = np.nonzero(viable)
+    return list(zip(onss_ids[rows].tolist(), onss_ids[cols].tolist()))
 
 def get_viable_entities(viable_ec1, viable_ec2, viable_ec3):
     """
@@ -381,6 +453,67 @@ def get_viable_entities(viable_ec1, viable_ec2, viable_ec3):
 
     return viable_wf, viable_eh, viable_onss
 
+def solve_milp(model, options):
+    """
+    Solve the model with scipy.optimize.milp by compiling it directly to sparse matrices,
+    without writing a model file or passing through a solver interface.
+
+    Parameters:
+    - model (ConcreteModel): The Pyomo model with a single linear objective.
+    - options (dict): Options passed to scipy.optimize.milp.
+
+    Returns:
+    - SolverResults: Results with the solver status and termination condition, the solution is loaded into the model.
+    """
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    from pyomo.repn.plugins.standard_form import LinearStandardFormCompiler
+    from pyomo.opt import SolverResults
+
+    # Compile the model to min c'x s.t. Ax <= b, with equalities as two opposite rows
+    repn = LinearStandardFormCompiler().write(model)
+    c = repn.c.toarray()[0]
+
+    # Variable bounds and integrality are taken from the model columns
+    lb = np.array([-np.inf if var.lb is None else var.lb for var in repn.columns], dtype=float)
+    ub = np.array([np.inf if var.ub is None else var.ub for var in repn.columns], dtype=float)
+    integrality = np.array([1 if var.is_integer() else 0 for var in repn.columns])
+
+    res = milp(c, constraints=LinearConstraint(repn.A, -np.inf, repn.rhs), bounds=Bounds(lb, ub),
+               integrality=integrality, options=options)
+
+    results = SolverResults()
+    if res.x is not None:
+        # Load the solution back into the model variables
+        for var, val in zip(repn.columns, res.x):
+            var.set_value(val, skip_validation=True)
+        results.solver.status = SolverStatus.ok
+        results.solver.termination_condition = TerminationCondition.optimal if res.status == 0 else TerminationCondition.maxTimeLimit
+    elif res.status == 2:
+        results.solver.status = SolverStatus.warning
+        results.solver.termination_condition = TerminationCondition.infeasible
+    else:
+        results.solver.status = SolverStatus.error
+        results.solver.termination_condition = TerminationCondition.error
+    print(res.message)
+
+    return results
+
+def dataset_to_frame(dataset, columns):
+    """
+    Convert a structured dataset array into a DataFrame indexed by component identifier.
+    The fields are read as whole columns by their position in the dtype.
+
+    Parameters:
+    - dataset (np.ndarray): Structured array with the component identifier as its first field.
+    - columns (list): Column names for the leading fields of the dataset, starting with 'id'.
+
+    Returns:
+    - pd.DataFrame: DataFrame with the selected columns, indexed by integer component identifier.
+    """
+    df = pd.DataFrame({col: dataset[name] for col, name in zip(columns, dataset.dtype.names)})
+    df['id'] = df['id'].astype(int)
+    return df.set_index('id')
+
 def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, linear_result=0):
     """
     Create an optimization model for offshore wind farm layout optimization.
@@ -471,7 +604,26 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         'SE': 2.01 * 1e-2   # Sweden
     }
     
-    solver_options = {
+    solver_name = 'highs' # Define the solver ('highs', 'scip' or 'milp')
+    
+    highs_options = {
+        'mip_rel_gap': 0,                    # Stop when the relative optimality gap is 0%
+        'mip_max_nodes': 10000,              # Maximum number of nodes in the search tree
+        'time_limit': 3600,                  # Set a time limit of 3600 seconds (1 hour)
+        'mip_feasibility_tolerance': 1e-5,   # Feasibility tolerance for constraints
+        'dual_feasibility_tolerance': 1e-5,  # Tolerance for dual feasibility conditions
+        'presolve': 'on'                     # Run presolve before branch-and-cut
+    }
+    
+    milp_options = {
+        'mip_rel_gap': 0,                    # Stop when the relative optimality gap is 0%
+        'node_limit': 10000,                 # Maximum number of nodes in the search tree
+        'time_limit': 3600,                  # Set a time limit of 3600 seconds (1 hour)
+        'presolve': True,                    # Run presolve before branch-and-cut
+        'disp': True                         # Display the solver progress
+    }
+    
+    scip_options = {
         'limits/gap': 0,                  # Stop when the relative optimality gap is 0.6%
         'limits/nodes': 1e4,                 # Maximum number of nodes in the search tree
         'limits/solutions': -1,             # Limit on the number of solutions found
@@ -547,45 +699,33 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     eh_dataset = np.load(eh_dataset_file, allow_pickle=True)
     onss_dataset = np.load(onss_dataset_file, allow_pickle=True)
 
+    # Load the datasets into typed column tables indexed by component identifier
+    wf_df = dataset_to_frame(wf_dataset, ['id', 'iso', 'lon', 'lat', 'cap', 'cost_1', 'cost_2', 'cost_3'])
+    wf_df = wf_df.astype({'lon': float, 'lat': float, 'cap': float, 'cost_1': float, 'cost_2': float, 'cost_3': float})
+    
+    eh_df = dataset_to_frame(eh_dataset, ['id', 'iso', 'lon', 'lat', 'wdepth', 'icover', 'pdist'])
+    eh_df = eh_df.astype({'lon': float, 'lat': float, 'wdepth': int, 'icover': int, 'pdist': float})
+    
+    onss_df = dataset_to_frame(onss_dataset, ['id', 'iso', 'lon', 'lat', 'thold'])
+    onss_df = onss_df.astype({'lon': float, 'lat': float, 'thold': float})
+    
+    # Map the ISO country codes to their integers
+    for df in [wf_df, eh_df, onss_df]:
+        df['iso'] = df['iso'].map(iso_to_int_mp).astype(int)
+
     # Component identifiers
-    wf_ids = [int(data[0]) for data in wf_dataset]
-    eh_ids = [int(data[0]) for data in eh_dataset]
-    onss_ids = [int(data[0]) for data in onss_dataset]
-
-    # Wind farm data
-    wf_iso, wf_lon, wf_lat, wf_cap, wf_cost_1, wf_cost_2, wf_cost_3 = {}, {}, {}, {}, {}, {}, {}
-
-    for data in wf_dataset:
-        id = int(data[0])
-        wf_iso[id] = iso_to_int_mp[data[1]]
-        wf_lon[id] = float(data[2])
-        wf_lat[id] = float(data[3])
-        wf_cap[id] = float(data[4])
-        wf_cost_1[id] = float(data[5])
-        wf_cost_2[id] = float(data[6])
-        wf_cost_3[id] = float(data[7])
+    wf_ids = wf_df.index.tolist()
+    eh_ids = eh_df.index.tolist()
+    onss_ids = onss_df.index.tolist()
 
-    # Offshore substation data
-    eh_iso, eh_lon, eh_lat, eh_wdepth, eh_icover, eh_pdist = {}, {}, {}, {}, {}, {}
+    # Wind farm data, one dictionary per column for the model parameters
+    wf_iso, wf_lon, wf_lat, wf_cap, wf_cost_1, wf_cost_2, wf_cost_3 = (wf_df[col].to_dict() for col in ['iso', 'lon', 'lat', 'cap', 'cost_1', 'cost_2', 'cost_3'])
 
-    for data in eh_dataset:
-        id = int(data[0])
-        eh_iso[id] = iso_to_int_mp[data[1]]
-        eh_lon[id] = float(data[2])
-        eh_lat[id] = float(data[3])
-        eh_wdepth[id] = int(data[4])
-        eh_icover[id] = int(data[5])
-        eh_pdist[id] = float(data[6])
+    # Offshore substation data
+    eh_iso, eh_lon, eh_lat, eh_wdepth, eh_icover, eh_pdist = (eh_df[col].to_dict() for col in ['iso', 'lon', 'lat', 'wdepth', 'icover', 'pdist'])
     
     # Onshore substation data
-    onss_iso, onss_lon, onss_lat, onss_thold = {}, {}, {}, {}
-
-    for data in onss_dataset:
-        id = int(data[0])
-        onss_iso[id] = iso_to_int_mp[data[1]]
-        onss_lon[id] = float(data[2])
-        onss_lat[id] = float(data[3])
-        onss_thold[id] = float(data[4])
+    onss_iso, onss_lon, onss_lat, onss_thold = (onss_df[col].to_dict() for col in ['iso', 'lon', 'lat', 'thold'])
 
     """
     Define model parameters
@@ -648,22 +788,61 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     """
     print("Defining decision variables...")
     
+    # Calculate the distance matrices once, rows and columns follow the ID order of the datasets
+    wf_id_arr, eh_id_arr, ec1_dist_mat = distance_matrix(wf_df, eh_df, 250)
+    _, onss_id_arr, ec2_dist_mat = distance_matrix(eh_df, onss_df, 250)
+    _, _, ec3_dist_mat = distance_matrix(wf_df, onss_df, 500)
+    _, _, onc_dist_mat = distance_matrix(onss_df, onss_df, 250)
+    
+    # Map the component identifiers to their row and column positions
+    wf_pos = {wf: i for i, wf in enumerate(wf_id_arr.tolist())}
+    eh_pos = {eh: i for i, eh in enumerate(eh_id_arr.tolist())}
+    onss_pos = {onss: i for i, onss in enumerate(onss_id_arr.tolist())}
+    
     # Calculate viable connections
-    viable_ec1 = find_viable_ec1(wf_lon, wf_lat, eh_lon, eh_lat)
-    viable_ec2 = find_viable_ec2(eh_lon, eh_lat, onss_lon, onss_lat)
-    viable_ec3 = find_viable_ec3(wf_lon, wf_lat, onss_lon, onss_lat)
-    viable_onc = find_viable_onc(onss_lon, onss_lat)
+    viable_ec1 = find_viable_ec1(wf_id_arr, eh_id_arr, ec1_dist_mat)
+    viable_ec2 = find_viable_ec2(eh_id_arr, onss_id_arr, ec2_dist_mat, eh_iso, onss_iso)
+    viable_ec3 = find_viable_ec3(wf_id_arr, onss_id_arr, ec3_dist_mat)
+    viable_onc = find_viable_onc(onss_id_arr, onc_dist_mat, onss_iso)
+    
+    # Report the cross-border pairs that were pruned before reaching the solver
+    pruned_ec2 = np.count_nonzero(ec2_dist_mat <= 250) - len(viable_ec2)
+    pruned_onc = np.count_nonzero(onc_dist_mat <= 250) - len(onss_id_arr) - len(viable_onc)
+    print(f"Pruned {pruned_ec2} cross-border export cables and {pruned_onc} cross-border onshore cables")
     
     model.viable_ec1_ids = Set(initialize=viable_ec1, dimen=2)
     model.viable_ec2_ids = Set(initialize=viable_ec2, dimen=2)
     model.viable_ec3_ids = Set(initialize=viable_ec3, dimen=2)
     model.viable_onc_ids = Set(initialize=viable_onc, dimen=2)
     
+    # Gather the distances of the viable connections from the precomputed matrices in one indexing step
+    ec1_dist_arr = pair_distances(viable_ec1, ec1_dist_mat, wf_pos, eh_pos)
+    ec2_dist_arr = pair_distances(viable_ec2, ec2_dist_mat, eh_pos, onss_pos)
+    ec3_dist_arr = pair_distances(viable_ec3, ec3_dist_mat, wf_pos, onss_pos)
+    onc_dist_arr = pair_distances(viable_onc, onc_dist_mat, onss_pos, onss_pos)
+    
+    # Connection distances
+    model.ec1_dist = Param(model.viable_ec1_ids, initialize=dict(zip(viable_ec1, ec1_dist_arr.tolist())), within=NonNegativeReals)
+    model.ec2_dist = Param(model.viable_ec2_ids, initialize=dict(zip(viable_ec2, ec2_dist_arr.tolist())), within=NonNegativeReals)
+    model.ec3_dist = Param(model.viable_ec3_ids, initialize=dict(zip(viable_ec3, ec3_dist_arr.tolist())), within=NonNegativeReals)
+    model.onc_dist = Param(model.viable_onc_ids, initialize=dict(zip(viable_onc, onc_dist_arr.tolist())), within=NonNegativeReals)
+    
+    # Cable cost per MW of capacity, the linear cost functions are evaluated once on the whole distance array of each cable type
+    model.ec1_cost_coef = Param(model.viable_ec1_ids, initialize=dict(zip(viable_ec1, ec1_cost_fun(first_year_sf, ec1_dist_arr, 1).tolist())), within=NonNegativeReals)
+    model.ec2_cost_coef = Param(model.viable_ec2_ids, initialize=dict(zip(viable_ec2, ec2_cost_fun(first_year_sf, ec2_dist_arr, 1).tolist())), within=NonNegativeReals)
+    model.ec3_cost_coef = Param(model.viable_ec3_ids, initialize=dict(zip(viable_ec3, ec3_cost_fun(first_year_sf, ec3_dist_arr, 1).tolist())), within=NonNegativeReals)
+    model.onc_cost_coef = Param(model.viable_onc_ids, initialize=dict(zip(viable_onc, onc_cost_fun(first_year_sf, onc_dist_arr, 1).tolist())), within=NonNegativeReals)
+    
     # Calculate viable entities based on the viable connections
-    model.viable_wf_ids, model.viable_eh_ids, model.viable_onss_ids = get_viable_entities(viable_ec1, viable_ec2, viable_ec3)
+    viable_wf, viable_eh, viable_onss = get_viable_entities(viable_ec1, viable_ec2, viable_ec3)
+    
+    # Index the variables by shared, ordered integer sets instead of a new implicit set per component
+    model.viable_wf_ids = Set(initialize=sorted(viable_wf), within=NonNegativeIntegers)
+    model.viable_eh_ids = Set(initialize=sorted(viable_eh), within=NonNegativeIntegers)
+    model.viable_onss_ids = Set(initialize=sorted(viable_onss), within=NonNegativeIntegers)
     
-    # Initialize variables without time index for capacity
-    model.wf_cap_var = Var(model.viable_wf_ids, within=NonNegativeReals)
+    # Initialize variables without time index for capacity, the capacity limits are set as bounds instead of constraints
+    model.wf_cap_var = Var(model.viable_wf_ids, within=NonNegativeReals, bounds=lambda model, wf: (0, model.wf_cap[wf]))
     model.onss_cap_var = Var(model.viable_onss_ids, within=NonNegativeReals)
     model.onc_cap_var = Var(model.viable_onc_ids, within=NonNegativeReals)
     
@@ -673,19 +852,23 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         model.ec2_cap_var = Var(model.viable_ec2_ids, within=NonNegativeReals, bounds=(0, 0))
         model.ec3_cap_var = Var(model.viable_ec3_ids, within=NonNegativeReals)
     elif model_type == 1: # Hub-and-spoke connections
-        model.eh_cap_var = Var(model.viable_eh_ids, within=NonNegativeReals)
+        model.eh_cap_var = Var(model.viable_eh_ids, within=NonNegativeReals, bounds=(0, eh_cap_lim))
         model.ec1_cap_var = Var(model.viable_ec1_ids, within=NonNegativeReals)
         model.ec2_cap_var = Var(model.viable_ec2_ids, within=NonNegativeReals)
         model.ec3_cap_var = Var(model.viable_ec3_ids, within=NonNegativeReals, bounds=(0, 0))
     elif model_type == 2: # Combined connections
-        model.eh_cap_var = Var(model.viable_eh_ids, within=NonNegativeReals)
+        model.eh_cap_var = Var(model.viable_eh_ids, within=NonNegativeReals, bounds=(0, eh_cap_lim))
         model.ec1_cap_var = Var(model.viable_ec1_ids, within=NonNegativeReals)
         model.ec2_cap_var = Var(model.viable_ec2_ids, within=NonNegativeReals)
         model.ec3_cap_var = Var(model.viable_ec3_ids, within=NonNegativeReals)
 
     model.onss_cost_var = Var(model.viable_onss_ids, within=NonNegativeReals)
 
-    model.wf_country_alloc_var = Var(model.viable_wf_ids, model.country_ids, within=NonNegativeReals)
+    # Pairs of wind farms and countries that are reachable through at least one viable cable, other allocations could never be connected
+    viable_wf_country_pairs = sorted({(wf, eh_iso[eh]) for wf, eh in viable_ec1} | {(wf, onss_iso[onss]) for wf, onss in viable_ec3})
+    model.viable_wf_country_ids = Set(initialize=viable_wf_country_pairs, dimen=2)
+    
+    model.wf_country_alloc_var = Var(model.viable_wf_country_ids, within=NonNegativeReals)
     
     # Define the binary variable for each energy hub
     model.eh_active_bin_var = Var(model.viable_eh_ids, within=Binary)
@@ -700,8 +883,9 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     stg = ["sf", "mf"][multi_stage]
     
     # Calculate total capacity per country and save to Excel
+    wf_cap_iso = wf_df.groupby('iso')['cap'].sum()
     wf_cap_country = pd.DataFrame([
-        {'Country': country, 'Total Capacity (MW)': sum(wf_cap[wf] for wf in wf_ids if wf_iso[wf] == code)}
+        {'Country': country, 'Total Capacity (MW)': wf_cap_iso.get(code, 0)}
         for country, code in iso_to_int_mp.items()
     ])
     wf_cap_country.to_excel(os.path.join(results_dir, 'wf_cap_country.xlsx'), index=False)
@@ -727,7 +911,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             len(model.viable_ec2_ids),
             len(model.viable_ec3_ids),
             len(model.viable_onc_ids),
-            len(model.viable_wf_ids) * len(model.country_ids),
+            len(model.viable_wf_country_ids),
             len(model.viable_eh_ids)
         ]
     })
@@ -754,14 +938,10 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     model.wf_cost_exp = Expression(model.viable_wf_ids, rule=wf_cost_rule)
 
     """
-    Define distance and capacity expressions for Inter-Array Cables (IAC)
+    Define cost expressions for Inter-Array Cables (IAC)
     """
-    def ec1_distance_rule(model, wf, eh):
-        return haversine(model.wf_lon[wf], model.wf_lat[wf], model.eh_lon[eh], model.eh_lat[eh])
-    model.ec1_dist_exp = Expression(model.viable_ec1_ids, rule=ec1_distance_rule)
-
     def ec1_cost_rule(model, wf, eh):
-        return sf_ec1 * ec1_cost_fun(value(model.first_year), model.ec1_dist_exp[wf, eh], model.ec1_cap_var[wf, eh])
+        return sf_ec1 * model.ec1_cost_coef[wf, eh] * model.ec1_cap_var[wf, eh]
     model.ec1_cost_exp = Expression(model.viable_ec1_ids, rule=ec1_cost_rule)
 
     """
@@ -772,25 +952,17 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     model.eh_cost_exp = Expression(model.viable_eh_ids, rule=eh_cost_rule_with_binary)
 
     """
-    Define distance and capacity expressions for Export Cables (EC)
+    Define cost expressions for Export Cables (EC)
     """
-    def ec2_distance_rule(model, eh, onss):
-        return haversine(model.eh_lon[eh], model.eh_lat[eh], model.onss_lon[onss], model.onss_lat[onss])
-    model.ec2_dist_exp = Expression(model.viable_ec2_ids, rule=ec2_distance_rule)
-
     def ec2_cost_rule(model, eh, onss):
-        return sf_ec2 * ec2_cost_fun(value(model.first_year), model.ec2_dist_exp[eh, onss], model.ec2_cap_var[eh, onss])
+        return sf_ec2 * model.ec2_cost_coef[eh, onss] * model.ec2_cap_var[eh, onss]
     model.ec2_cost_exp = Expression(model.viable_ec2_ids, rule=ec2_cost_rule)
 
     """
-    Define distance and capacity expressions for direct connections (WF to ONSS)
+    Define cost expressions for direct connections (WF to ONSS)
     """
-    def ec3_distance_rule(model, wf, onss):
-        return haversine(model.wf_lon[wf], model.wf_lat[wf], model.onss_lon[onss], model.onss_lat[onss])
-    model.ec3_dist_exp = Expression(model.viable_ec3_ids, rule=ec3_distance_rule)
-
     def ec3_cost_rule(model, wf, onss):
-        return sf_ec3 * ec3_cost_fun(value(model.first_year), model.ec3_dist_exp[wf, onss], model.ec3_cap_var[wf, onss])
+        return sf_ec3 * model.ec3_cost_coef[wf, onss] * model.ec3_cap_var[wf, onss]
     model.ec3_cost_exp = Expression(model.viable_ec3_ids, rule=ec3_cost_rule)
 
     """
@@ -803,18 +975,28 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     """
     Define expressions for Onshore Substation Cables (ONC)
     """
-    def onc_distance_rule(model, onss1, onss2):
-        return haversine(model.onss_lon[onss1], model.onss_lat[onss1], model.onss_lon[onss2], model.onss_lat[onss2])
-    model.onc_dist_exp = Expression(model.viable_onc_ids, rule=onc_distance_rule)
-
     def onc_cost_rule(model, onss1, onss2):
-        return sf_onc * onc_cost_fun(value(model.first_year), model.onc_dist_exp[onss1, onss2], model.onc_cap_var[onss1, onss2])
+        return sf_onc * model.onc_cost_coef[onss1, onss2] * model.onc_cap_var[onss1, onss2]
     model.onc_cost_exp = Expression(model.viable_onc_ids, rule=onc_cost_rule)
 
     """
     Define Constraints
     """
     print("Defining capacity allocation constraints...")
+    
+    # Group the viable wind farms and their total capacity per country once, instead of scanning all wind farms per country
+    viable_wf_country = {country: [] for country in model.country_ids}
+    viable_wf_cap_country = {country: 0 for country in model.country_ids}
+    for wf in model.viable_wf_ids:
+        viable_wf_country[wf_iso[wf]].append(wf)
+        viable_wf_cap_country[wf_iso[wf]] += wf_cap[wf]
+    
+    # Group the reachable allocations per wind farm and per country
+    alloc_country_wf = {wf: [] for wf in model.viable_wf_ids}
+    alloc_wf_country = {country: [] for country in model.country_ids}
+    for wf, country in viable_wf_country_pairs:
+        alloc_country_wf[wf].append(country)
+        alloc_wf_country[country].append(wf)
 
     if cross_border == 1:
         def wf_country_cap_rule(model, country):
@@ -823,8 +1005,8 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             
             Ensures that each country is assigned enough capacity from the country's total available wind farm capacity to meet its required minimum.
             """
-            min_req_cap_country = model.country_cf[country] * sum(model.wf_cap[wf] for wf in model.viable_wf_ids if model.wf_iso[wf] == country)
-            cap_country = sum(model.wf_country_alloc_var[wf, country] for wf in model.viable_wf_ids)
+            min_req_cap_country = model.country_cf[country] * viable_wf_cap_country[country]
+            cap_country = quicksum(model.wf_country_alloc_var[wf, country] for wf in alloc_wf_country[country])
             return cap_country >= min_req_cap_country
         model.wf_country_cap_con = Constraint(model.country_ids, rule=wf_country_cap_rule)
     elif cross_border == 0:
@@ -834,8 +1016,8 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             
             Ensures that each country is assigned enough capacity from the total available wind farm capacity to meet its required minimum.
             """
-            min_req_cap_country = model.country_cf[country] * sum(model.wf_cap[wf] for wf in model.viable_wf_ids if model.wf_iso[wf] == country)
-            cap_country = sum(model.wf_country_alloc_var[wf, country] for wf in model.viable_wf_ids if model.wf_iso[wf] == country)
+            min_req_cap_country = model.country_cf[country] * viable_wf_cap_country[country]
+            cap_country = quicksum(model.wf_country_alloc_var[wf, country] for wf in viable_wf_country[country] if (wf, country) in model.viable_wf_country_ids)
             return cap_country >= min_req_cap_country
         model.wf_country_cap_con = Constraint(model.country_ids, rule=wf_country_cap_rule)
     
@@ -845,30 +1027,44 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         
         Ensures that each wind farm's total assigned capacity equals its selected wind farm capacity.
         """
-        return sum(model.wf_country_alloc_var[wf, country] for country in model.country_ids) == model.wf_cap_var[wf]
+        return quicksum(model.wf_country_alloc_var[wf, country] for country in alloc_country_wf[wf]) == model.wf_cap_var[wf]
     model.wf_alloc_con = Constraint(model.viable_wf_ids, rule=wf_alloc_rule)
 
-    def wf_cap_rule(model, wf):
-        """
-        Wind Farm Capacity Limit Constraint
-        
-        Ensures that each wind farm's selected capacity does not exceed its total available capacity.
-        """
-        return model.wf_cap_var[wf] <= model.wf_cap[wf]
-    model.wf_cap_con = Constraint(model.viable_wf_ids, rule=wf_cap_rule)
-
     print("Defining network constraints...")
     
+    # Adjacency lists of the viable connections per component, so the rules iterate only the connected components
+    ec1_eh_by_wf, ec1_wf_by_eh = defaultdict(list), defaultdict(list)
+    for wf, eh in viable_ec1:
+        ec1_eh_by_wf[wf].append(eh)
+        ec1_wf_by_eh[eh].append(wf)
+    
+    ec2_onss_by_eh, ec2_eh_by_onss = defaultdict(list), defaultdict(list)
+    for eh, onss in viable_ec2:
+        ec2_onss_by_eh[eh].append(onss)
+        ec2_eh_by_onss[onss].append(eh)
+    
+    ec3_onss_by_wf, ec3_wf_by_onss = defaultdict(list), defaultdict(list)
+    for wf, onss in viable_ec3:
+        ec3_onss_by_wf[wf].append(onss)
+        ec3_wf_by_onss[onss].append(wf)
+    
+    # Onshore cables only count between viable onshore substations
+    onc_out_by_onss, onc_in_by_onss = defaultdict(list), defaultdict(list)
+    for onss1, onss2 in viable_onc:
+        if onss1 in viable_onss and onss2 in viable_onss:
+            onc_out_by_onss[onss1].append(onss2)
+            onc_in_by_onss[onss2].append(onss1)
+    
     def wf_connection_rule(model, wf, country):
         """
         Wind Farm Network Constraint
         
         Ensures that each wind farm's assigned capacities are connected to the corresponding country's energy hub or onshore substation.
         """
-        connect_to_eh = sum(model.ec1_cap_var[wf, eh] for eh in model.viable_eh_ids if (wf, eh) in model.viable_ec1_ids and model.eh_iso[eh] == country)
-        connect_to_onss = sum(model.ec3_cap_var[wf, onss] for onss in model.viable_onss_ids if (wf, onss) in model.viable_ec3_ids and model.onss_iso[onss] == country)
+        connect_to_eh = quicksum(model.ec1_cap_var[wf, eh] for eh in ec1_eh_by_wf[wf] if eh_iso[eh] == country)
+        connect_to_onss = quicksum(model.ec3_cap_var[wf, onss] for onss in ec3_onss_by_wf[wf] if onss_iso[onss] == country)
         return connect_to_eh + connect_to_onss >= model.wf_country_alloc_var[wf, country]
-    model.wf_connection_con = Constraint(model.viable_wf_ids, model.country_ids, rule=wf_connection_rule)
+    model.wf_connection_con = Constraint(model.viable_wf_country_ids, rule=wf_connection_rule)
 
     def eh_cap_connect_rule(model, eh):
         """
@@ -876,19 +1072,10 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         
         Ensures that each energy hub's capacity matches or exceeds the total connected wind farm capacity.
         """
-        connect_from_wf = sum(model.ec1_cap_var[wf, eh] for wf in model.viable_wf_ids if (wf, eh) in model.viable_ec1_ids)
+        connect_from_wf = quicksum(model.ec1_cap_var[wf, eh] for wf in ec1_wf_by_eh[eh])
         return model.eh_cap_var[eh] >= connect_from_wf
     model.eh_cap_connect_con = Constraint(model.viable_eh_ids, rule=eh_cap_connect_rule)
 
-    def max_eh_cap_rule(model, eh):
-        """
-        Energy Hub Capacity Limit Constraint
-        
-        Ensures that each energy hub's capacity does not exceed a specified capacity limit.
-        """
-        return model.eh_cap_var[eh] <= eh_cap_lim
-    model.max_eh_cap_con = Constraint(model.viable_eh_ids, rule=max_eh_cap_rule)
-    
     def eh_active_rule(model, eh):
         """
         Energy Hub Activation Constraint
@@ -904,8 +1091,8 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         
         Ensures that each energy hub's capacity is connected to the corresponding country's onshore substation.
         """
-        country = model.eh_iso[eh]
-        connect_to_onss = sum(model.ec2_cap_var[eh, onss] for onss in model.viable_onss_ids if (eh, onss) in model.viable_ec2_ids and model.onss_iso[onss] == country)
+        country = eh_iso[eh]
+        connect_to_onss = quicksum(model.ec2_cap_var[eh, onss] for onss in ec2_onss_by_eh[eh] if onss_iso[onss] == country)
         return connect_to_onss >= model.eh_cap_var[eh]
     model.eh_to_onss_connect_con = Constraint(model.viable_eh_ids, rule=eh_to_onss_connection_rule)
 
@@ -915,11 +1102,11 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         
         Ensures that each substation's capacity is at least equal to the net connected capacity of connected wind farms, energy hubs and other domestic substations.
         """
-        country = model.onss_iso[onss]
-        connect_from_eh = sum(model.ec2_cap_var[eh, onss] for eh in model.viable_eh_ids if (eh, onss) in model.viable_ec2_ids)
-        connect_from_wf = sum(model.ec3_cap_var[wf, onss] for wf in model.viable_wf_ids if (wf, onss) in model.viable_ec3_ids)
-        distribute_to_others = sum(model.onc_cap_var[onss, other_onss] for other_onss in model.viable_onss_ids if (onss, other_onss) in model.viable_onc_ids and model.onss_iso[other_onss] == country)
-        receive_from_others = sum(model.onc_cap_var[other_onss, onss] for other_onss in model.viable_onss_ids if (other_onss, onss) in model.viable_onc_ids and model.onss_iso[other_onss] == country)
+        country = onss_iso[onss]
+        connect_from_eh = quicksum(model.ec2_cap_var[eh, onss] for eh in ec2_eh_by_onss[onss])
+        connect_from_wf = quicksum(model.ec3_cap_var[wf, onss] for wf in ec3_wf_by_onss[onss])
+        distribute_to_others = quicksum(model.onc_cap_var[onss, other_onss] for other_onss in onc_out_by_onss[onss] if onss_iso[other_onss] == country)
+        receive_from_others = quicksum(model.onc_cap_var[other_onss, onss] for other_onss in onc_in_by_onss[onss] if onss_iso[other_onss] == country)
         
         return model.onss_cap_var[onss] >= connect_from_eh + connect_from_wf + receive_from_others - distribute_to_others
     model.onss_cap_connect_con = Constraint(model.viable_onss_ids, rule=onss_cap_connect_rule)
@@ -957,15 +1144,15 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         This includes the cost of selecting and connecting wind farms, energy hubs, and onshore substations.
         The objective is to minimize this total cost for each year separately.
         """
-        wf_total_cost = sum(model.wf_cost_exp[wf] for wf in model.viable_wf_ids)
-        eh_total_cost = sum(model.eh_cost_exp[eh] for eh in model.viable_eh_ids)
-        onss_total_cost = sum(model.onss_cost_var[onss] for onss in model.viable_onss_ids)
-        ec1_total_cost = sum(model.ec1_cost_exp[wf, eh] for (wf, eh) in model.viable_ec1_ids)
-        ec2_total_cost = sum(model.ec2_cost_exp[eh, onss] for (eh, onss) in model.viable_ec2_ids)
-        ec3_total_cost = sum(model.ec3_cost_exp[wf, onss] for (wf, onss) in model.viable_ec3_ids)
-        onc_total_cost = sum(model.onc_cost_exp[onss1, onss2] for (onss1, onss2) in model.viable_onc_ids)
+        wf_total_cost = quicksum(model.wf_cost_exp[wf] for wf in model.viable_wf_ids)
+        eh_total_cost = quicksum(model.eh_cost_exp[eh] for eh in model.viable_eh_ids)
+        onss_total_cost = quicksum(model.onss_cost_var[onss] for onss in model.viable_onss_ids)
+        ec1_total_cost = quicksum(model.ec1_cost_exp[wf, eh] for (wf, eh) in model.viable_ec1_ids)
+        ec2_total_cost = quicksum(model.ec2_cost_exp[eh, onss] for (eh, onss) in model.viable_ec2_ids)
+        ec3_total_cost = quicksum(model.ec3_cost_exp[wf, onss] for (wf, onss) in model.viable_ec3_ids)
+        onc_total_cost = quicksum(model.onc_cost_exp[onss1, onss2] for (onss1, onss2) in model.viable_onc_ids)
         
-        onss_total_cap_aux = sum(model.onss_cap_var[onss] for onss in model.viable_onss_ids) # Ensures that the onss capacity is zero when not connected
+        onss_total_cap_aux = quicksum(model.onss_cap_var[onss] for onss in model.viable_onss_ids) # Ensures that the onss capacity is zero when not connected
         
         total_cost = wf_total_cost + eh_total_cost + ec1_total_cost + ec2_total_cost + ec3_total_cost + onss_total_cost + onc_total_cost + onss_total_cap_aux
 
@@ -977,18 +1164,39 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
     """
     print("Solving the model...")
     
-    # Set the path to the SCIP solver executable
-    scip_path = "C:\\Program Files\\SCIPOptSuite 9.0.0\\bin\\scip.exe"
-    
-    # Write options to a parameter file
-    param_file_path = os.path.join(workspace_folder, "scip_params.set")
-    
-    # Create solver object and specify the solver executable path
-    solver = SolverFactory('scip', executable=scip_path)
-    
-    with open(param_file_path, 'w') as param_file:
-        for key, val in solver_options.items():
-            param_file.write(f"{key} = {val}\n")
+    if solver_name == 'highs':
+        # Create the persistent HiGHS solver, which keeps the model in memory between solves
+        solver = SolverFactory('appsi_highs')
+        solver_options = highs_options
+        
+        # Only bounds and mutable parameters change between stages, so skip rescanning the constraints
+        solver.update_config.check_for_new_or_removed_constraints = False
+    elif solver_name == 'milp':
+        # Solve through scipy.optimize.milp directly from the sparse model matrices
+        solver = None
+        solver_options = milp_options
+    elif solver_name == 'scip':
+        # Set the path to the SCIP solver executable
+        scip_path = "C:\\Program Files\\SCIPOptSuite 9.0.0\\bin\\scip.exe"
+        
+        # Write options to a parameter file
+        param_file_path = os.path.join(workspace_folder, "scip_params.set")
+        
+        # Create solver object and specify the solver executable path
+        solver = SolverFactory('scip', executable=scip_path)
+        solver_options = scip_options
+        
+        with open(param_file_path, 'w') as param_file:
+            for key, val in solver_options.items():
+                param_file.write(f"{key} = {val}\n")
+
+    def run_solver(model, logfile_path):
+        """
+        Solve the model with the selected solver, the direct milp path prints its log instead of writing a log file.
+        """
+        if solver_name == 'milp':
+            return solve_milp(model, solver_options)
+        return solver.solve(model, tee=True, logfile=logfile_path, options=solver_options)
 
     def rnd_f(e):
             return round(value(e), 6)
@@ -1100,7 +1308,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             if value(model.ec1_cap_var[wf, eh]) > zero_th:
                 ec1_cap = rnd_f(model.ec1_cap_var[wf, eh])
                 ec1_cap_diff = ec1_cap - prev_capacity.get('ec1_cap_var', {}).get((wf, eh), 0)
-                dist1 = rnd_f(haversine(model.wf_lon[wf], model.wf_lat[wf], model.eh_lon[eh], model.eh_lat[eh]))
+                dist1 = rnd_f(model.ec1_dist[wf, eh])
                 if linear_result == 1:
                     ec1_cost_sf = sf_ec1 * rnd_f(ec1_cost_fun(value(model.first_year_sf), dist1, value(model.ec1_cap_var[wf, eh]), "lin"))
                     ec1_cost = sf_ec1 * rnd_f(ec1_cost_fun(value(model.first_year), dist1, ec1_cap_diff, "lin"))
@@ -1122,7 +1330,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             if value(model.ec2_cap_var[eh, onss]) > zero_th:
                 ec2_cap = rnd_f(model.ec2_cap_var[eh, onss])
                 ec2_cap_diff = ec2_cap - prev_capacity.get('ec2_cap_var', {}).get((eh, onss), 0)
-                dist2 = rnd_f(haversine(model.eh_lon[eh], model.eh_lat[eh], model.onss_lon[onss], model.onss_lat[onss]))
+                dist2 = rnd_f(model.ec2_dist[eh, onss])
                 if linear_result == 1:
                     ec2_cost = sf_ec2 * rnd_f(ec2_cost_fun(value(model.first_year), dist2, ec2_cap_diff, "lin"))
                     ec2_cost_sf = sf_ec2 * rnd_f(ec2_cost_fun(value(model.first_year_sf), dist2, value(model.ec2_cap_var[eh, onss]), "lin"))
@@ -1144,7 +1352,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             if value(model.ec3_cap_var[wf, onss]) > zero_th:
                 ec3_cap = rnd_f(model.ec3_cap_var[wf, onss])
                 ec3_cap_diff = ec3_cap - prev_capacity.get('ec3_cap_var', {}).get((wf, onss), 0)
-                dist3 = rnd_f(haversine(model.wf_lon[wf], model.wf_lat[wf], model.onss_lon[onss], model.onss_lat[onss]))
+                dist3 = rnd_f(model.ec3_dist[wf, onss])
                 if linear_result == 1:
                     ec3_cost = sf_ec3 * rnd_f(ec3_cost_fun(value(model.first_year), dist3, ec3_cap_diff, "lin"))
                     ec3_cost_sf = sf_ec3 * rnd_f(ec3_cost_fun(value(model.first_year_sf), dist3, value(model.ec3_cap_var[wf, onss]), "lin"))
@@ -1166,7 +1374,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             if value(model.onc_cap_var[onss1, onss2]) is not None and value(model.onc_cap_var[onss1, onss2]) > zero_th:
                 onc_cap = rnd_f(model.onc_cap_var[onss1, onss2])
                 onc_cap_diff = onc_cap - prev_capacity.get('onc_ids', {}).get((onss1, onss2), 0)
-                dist4 = rnd_f(haversine(model.onss_lon[onss1], model.onss_lat[onss1], model.onss_lon[onss2], model.onss_lat[onss2]))
+                dist4 = rnd_f(model.onc_dist[onss1, onss2])
                 if linear_result == 1:
                     onc_cost = sf_onc * rnd_f(onc_cost_fun(value(model.first_year), dist4, onc_cap_diff, "lin"))
                     onc_cost_sf = sf_onc * rnd_f(onc_cost_fun(value(model.first_year_sf), dist4, value(model.onc_cap_var[onss1, onss2]), "lin"))
@@ -1245,7 +1453,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
         logfile_path = os.path.join(workspace_folder, "results", "combined", f"r_{stg}_{tpe}_{crb}_solverlog_{year_param}.txt")
         
         # Solve the model, passing the parameter file as an option
-        results = solver.solve(model, tee=True, logfile=logfile_path, options=solver_options)
+        results = run_solver(model, logfile_path)
             
         # Detailed checking of solver results
         if results.solver.status == SolverStatus.ok:
@@ -1319,7 +1527,7 @@ def opt_model(workspace_folder, model_type=0, cross_border=1, multi_stage=0, lin
             model.wf_cost.store_values(wf_cost_params[year])
             
             logfile_path = os.path.join(workspace_folder, "results", "combined", f"r_{stg}_{tpe}_{crb}_solverlog_{year}.txt")
-            results = solver.solve(model, tee=True, logfile=logfile_path, options=solver_options)
+            results = run_solver(model, logfile_path)
             
             if results.solver.status == SolverStatus.ok:
                 status_msg = "optimal solution" if results.solver.termination_condition == TerminationCondition.optimal else "stopped due to limit"
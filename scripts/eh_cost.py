@@ -1,3 +1,22 @@
+import numpy as np
+
+# Support structure indices into the installation and decommissioning tables, and the number of vessels they use
+supp_index = {'jacket': 0, 'floating': 1}
+supp_vessels = (1, 2)
+
+# Installation coefficients for different vehicles, indexed by [support structure, vessel]
+# (jacket: PSIV, floating: HLCV and AHV), unused vessel rows are zero
+inst_coeff = np.array([
+    [(1, 18.5, 24, 96, 200), (0, 0, 0, 0, 0)],
+    [(1, 22.5, 10, 0, 40), (3, 18.5, 30, 90, 40)]
+])
+
+# Decommissioning coefficients for different vehicles, indexed by [support structure, vessel]
+deco_coeff = np.array([
+    [(1, 18.5, 24, 96, 200), (0, 0, 0, 0, 0)],
+    [(1, 22.5, 10, 0, 40), (3, 18.5, 30, 30, 40)]
+])
+
 def check_supp(water_depth):
         """
         Determines the support structure type based on water depth.
@@ -57,37 +76,15 @@ def inst_deco_cost_lin(supp_structure, port_distance, operation):
     """
     port_distance *= 1e-3 # Port distance in km
     
-    # Installation coefficients for different vehicles
-    inst_coeff = {
-        ('jacket' 'PSIV'): (1, 18.5, 24, 96, 200),
-        ('floating','HLCV'): (1, 22.5, 10, 0, 40),
-        ('floating','AHV'): (3, 18.5, 30, 90, 40)
-    }
-
-    # Decommissioning coefficients for different vehicles
-    deco_coeff = {
-        ('jacket' 'PSIV'): (1, 18.5, 24, 96, 200),
-        ('floating','HLCV'): (1, 22.5, 10, 0, 40),
-        ('floating','AHV'): (3, 18.5, 30, 30, 40)
-    }
-
     # Choose the appropriate coefficients based on the operation type
     coeff = inst_coeff if operation == 'inst' else deco_coeff
-        
-    if supp_structure == 'jacket':
-        c1, c2, c3, c4, c5 = coeff[('jacket' 'PSIV')]
-        # Calculate installation cost for jacket
-        total_cost = ((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1e3) / 24
-    elif supp_structure == 'floating':
-        total_cost = 0
-        
-        # Iterate over the coefficients for floating (HLCV and AHV)
-        for vessel_type in [('floating', 'HLCV'), ('floating', 'AHV')]:
-            c1, c2, c3, c4, c5 = coeff[vessel_type]
-            # Calculate installation cost for the current vessel type
-            vessel_cost = ((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1e3) / 24
-            # Add the cost for the current vessel type to the total cost
-            total_cost += vessel_cost
+    
+    # Coefficients of the vessels used for the support structure, one column per coefficient
+    supp_idx = supp_index[supp_structure]
+    c1, c2, c3, c4, c5 = coeff[supp_idx, :supp_vessels[supp_idx]].T
+    
+    # Calculate the cost per vessel type and add them up (jacket: PSIV, floating: HLCV and AHV)
+    total_cost = np.sum(((1 / c1) * ((2 * port_distance) / c2 + c3) + c4) * (c5 * 1e3) / 24)
     
     total_cost *= 1e-6
     
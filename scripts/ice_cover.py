@@ -0,0 +1,21 @@
+import arcpy
+import numpy as np
+from scripts.polygon_rings import get_rings
+
+def read_ice_polygons(ic_layer):
+    """
+    Reads the ice polygons once as ring arrays together with their bounding boxes.
+
+    Parameters:
+        ic_layer (arcpy.mp.Layer): Layer with the maximum ice extent polygons.
+
+    Returns:
+        tuple: Spatial reference of the layer, ring arrays of each polygon and an (M, 4) array with their bounding boxes.
+    """
+    ice_sr = arcpy.Describe(ic_layer).spatialReference
+    with arcpy.da.SearchCursor(ic_layer, ["SHAPE@"]) as cursor:
+        ice_polygons = [row[0] for row in cursor]
+    ice_rings = [get_rings(polygon) for polygon in ice_polygons]
+    ice_extents = np.array([(polygon.extent.XMin, polygon.extent.YMin, polygon.extent.XMax, polygon.extent.YMax)
+                            for polygon in ice_polygons], dtype=float).reshape(-1, 4)
+    return ice_sr, ice_rings, ice_extents
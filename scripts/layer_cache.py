@@ -0,0 +1,80 @@
+import arcpy
+import json
+import os
+import time
+
+def cache_index_path():
+    """
+    Return the path of the file that records when each feature class was cached in the scratch geodatabase.
+
+    Returns:
+        str: Path to the cache index file, stored next to the scratch geodatabase.
+    """
+    return os.path.join(os.path.dirname(arcpy.env.scratchGDB), "layer_cache.json")
+
+def read_cache_index():
+    """
+    Read the cache index mapping cached feature class names to the time they were cached.
+
+    Returns:
+        dict: Feature class name to cache timestamp in seconds since the epoch.
+    """
+    index_path = cache_index_path()
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+def is_cache_fresh(name, max_age_days=30):
+    """
+    Check whether a feature class in the scratch geodatabase exists and was cached less than the given age ago.
+
+    Parameters:
+        name (str): Name of the cached feature class in the scratch geodatabase.
+        max_age_days (float): Age in days after which the cached copy is considered stale.
+
+    Returns:
+        bool: True if the cached copy can be reused.
+    """
+    cached_time = read_cache_index().get(name)
+    if cached_time is None or not arcpy.Exists(os.path.join(arcpy.env.scratchGDB, name)):
+        return False
+    return time.time() - cached_time <= max_age_days * 86400
+
+def mark_cached(name):
+    """
+    Record the current time as the cache time of a feature class in the scratch geodatabase.
+    Call this only after the feature class has been written completely.
+
+    Parameters:
+        name (str): Name of the cached feature class in the scratch geodatabase.
+    """
+    index = read_cache_index()
+    index[name] = time.time()
+    with open(cache_index_path(), "w") as f:
+        json.dump(index, f, indent=2)
+
+def get_cached_layer(feature_layer_url, name, max_age_days=30):
+    """
+    Return a local copy of a remote feature service, downloading it to the scratch geodatabase only when
+    the cached copy is missing or older than the given age.
+
+    Parameters:
+        feature_layer_url (str): URL of the feature service layer.
+        name (str): Name of the cached feature class in the scratch geodatabase.
+        max_age_days (float): Age in days after which the cached copy is refreshed.
+
+    Returns:
+        str: Path to the cached feature class.
+    """
+    cached_fc = os.path.join(arcpy.env.scratchGDB, name)
+
+    # Download the feature service only if there is no recent local copy
+    if not is_cache_fresh(name, max_age_days):
+        arcpy.AddMessage(f"Downloading {name} to the scratch geodatabase...")
+        if arcpy.Exists(cached_fc):
+            arcpy.management.Delete(cached_fc)
+        arcpy.conversion.ExportFeatures(feature_layer_url, cached_fc)
+        mark_cached(name)
+
+    return cached_fc
@@ -0,0 +1,85 @@
+import json
+import numpy as np
+from numba import njit
+
+def get_rings(shape):
+    """
+    Extracts the rings of a polygon as NumPy arrays, reading the coordinates at once from the Esri JSON of the polygon.
+    Polygons with true curves are densified first, since their JSON only holds curveRings.
+
+    Parameters:
+        shape (arcpy.Polygon): Polygon geometry.
+
+    Returns:
+        list: (K, 2) NumPy arrays with the XY coordinates of each ring.
+    """
+    # Replace the curves by straight segments, spaced at a thousandth of the polygon extent
+    if shape.hasCurves:
+        spacing = max(shape.extent.width, shape.extent.height) / 1000
+        shape = shape.densify("DISTANCE", spacing, spacing / 10)
+
+    rings = json.loads(shape.JSON).get("rings", [])
+    return [np.array(ring, dtype=float)[:, :2] for ring in rings if len(ring) > 2]
+
+@njit(cache=True)
+def ring_contains_points(ring, points):
+    """
+    Tests which points lie within a single ring using the crossing number algorithm, compiled with Numba.
+
+    Parameters:
+        ring (np.ndarray): (K, 2) array with the XY coordinates of the ring.
+        points (np.ndarray): (N, 2) array with the XY coordinates of the points.
+
+    Returns:
+        np.ndarray: Boolean mask that is True for points within the ring.
+    """
+    n = ring.shape[0]
+    inside = np.zeros(points.shape[0], dtype=np.bool_)
+    for i in range(points.shape[0]):
+        x, y = points[i, 0], points[i, 1]
+        crossing = False
+        j = n - 1
+        for k in range(n):
+            # Count the ring edges crossed by a ray from the point in the positive x direction
+            if (ring[k, 1] > y) != (ring[j, 1] > y):
+                if x < (ring[j, 0] - ring[k, 0]) * (y - ring[k, 1]) / (ring[j, 1] - ring[k, 1]) + ring[k, 0]:
+                    crossing = not crossing
+            j = k
+        inside[i] = crossing
+    return inside
+
+def points_in_polygons(points, polygon_rings, extents=None):
+    """
+    Test which points lie within any of the polygons in vectorized operations. Only points
+    that fall inside the bounding box of a polygon are tested against its rings, and the ring
+    results are combined with the even-odd rule, so points within holes are excluded.
+
+    Parameters:
+        points (np.ndarray): (N, 2) array with the XY coordinates of the points.
+        polygon_rings (list): Ring arrays of each polygon, in the same spatial reference as the points.
+        extents (np.ndarray, optional): (M, 4) array with the XMin, YMin, XMax, YMax of each polygon.
+            Computed from the rings when not given.
+
+    Returns:
+        np.ndarray: Boolean mask that is True for points within any polygon.
+    """
+    # Compute the bounding boxes from the rings when they are not given, polygons without rings get an empty box
+    if extents is None:
+        extents = [(*np.vstack(rings).min(axis=0), *np.vstack(rings).max(axis=0)) if rings else (np.inf, np.inf, -np.inf, -np.inf)
+                   for rings in polygon_rings]
+
+    inside = np.zeros(len(points), dtype=bool)
+
+    for rings, (xmin, ymin, xmax, ymax) in zip(polygon_rings, extents):
+        # Candidate points are the unmatched points within the bounding box of the polygon
+        candidates = np.nonzero(~inside &
+                                (points[:, 0] >= xmin) & (points[:, 0] <= xmax) &
+                                (points[:, 1] >= ymin) & (points[:, 1] <= ymax))[0]
+
+        # Test all candidates against every ring of the polygon at once
+        mask = np.zeros(len(candidates), dtype=bool)
+        for ring in rings:
+            mask ^= ring_contains_points(ring, points[candidates])
+        inside[candidates[mask]] = True
+
+    return inside
@@ -1,3 +1,11 @@
+# Discount rate and the yearly discount factor
+discount_rate = 0.05
+discount = 1 / (1 + discount_rate)
+
+# Operational years, and the sum of their discount factors relative to the first operational year (geometric series)
+ope_years = 25
+ope_annuity = (1 - discount ** ope_years) / (1 - discount)
+
 def present_value(first_year, equip_cost, inst_cost, ope_cost_yearly, deco_cost):
     """
     Calculate the total present value of cable cost.
@@ -17,25 +25,17 @@ def present_value(first_year, equip_cost, inst_cost, ope_cost_yearly, deco_cost)
     # Define years for installation, operational, and decommissioning
     inst_year = (first_year - current_year)  # First year (installation year)
     ope_year = inst_year + 5  # Operational costs start year
-    dec_year = ope_year + 25  # Decommissioning year
-    end_year = dec_year + 2  # End year
-
-    # Discount rate
-    discount_rate = 0.05
+    dec_year = ope_year + ope_years  # Decommissioning year
 
-    # Initialize total operational cost
-    total_ope_cost = 0
-
-    # Adjust cost for each year
-    for year in range(inst_year, end_year + 1):
-        discount_factor = (1 + discount_rate) ** -year  # Calculate the discount factor for the year
-        if year == inst_year:
-            equip_cost *= discount_factor  # Discount equipment cost for the installation year
-            inst_cost *= discount_factor  # Discount installation cost for the installation year
-        elif ope_year <= year < dec_year:
-            total_ope_cost += ope_cost_yearly * discount_factor  # Accumulate discounted operational cost for each year
-        elif year == dec_year:
-            deco_cost *= discount_factor  # Discount decommissioning cost for the decommissioning year
+    # Discount equipment and installation cost for the installation year
+    equip_cost = equip_cost * discount ** inst_year
+    inst_cost = inst_cost * discount ** inst_year
+    
+    # Sum the discounted operational cost over the operational years
+    total_ope_cost = ope_cost_yearly * discount ** ope_year * ope_annuity
+    
+    # Discount decommissioning cost for the decommissioning year
+    deco_cost = deco_cost * discount ** dec_year
 
     # Calculate total present value of cost
     total_cost = equip_cost + inst_cost + total_ope_cost + deco_cost
@@ -55,33 +55,6 @@ def present_value_single(first_year, equip_cost, inst_cost, ope_cost_yearly, dec
         Returns:
             float: Total present value of cost.
         """
-        first_year = int(first_year)
-        current_year = 2024
-        
-        # Define years for installation, operational, and decommissioning
-        inst_year = (first_year - current_year) # First year (installation year)
-        ope_year = inst_year + 5  # Operational costs start year
-        dec_year = ope_year + 25  # Decommissioning year
-        end_year = dec_year + 2  # End year
-
-        # Discount rate
-        discount_rate = 0.05
-
-        # Initialize total operational cost
-        total_ope_cost = 0
-
-        # Adjust cost for each year
-        for year in range(inst_year, end_year + 1):
-            discount_factor = (1 + discount_rate) ** -year  # Calculate the discount factor for the year
-            if year == inst_year:
-                equip_cost *= discount_factor  # Discount equipment cost for the installation year
-                inst_cost *= discount_factor  # Discount installation cost for the installation year
-            elif ope_year <= year < dec_year:
-                total_ope_cost += ope_cost_yearly * discount_factor  # Accumulate discounted operational cost for each year
-            elif year == dec_year:
-                deco_cost *= discount_factor  # Discount decommissioning cost for the decommissioning year
-
-        # Calculate total present value of cost
-        total_cost = equip_cost + inst_cost + total_ope_cost + deco_cost
+        total_cost, _, _, _, _ = present_value(first_year, equip_cost, inst_cost, ope_cost_yearly, deco_cost)
 
         return total_cost
@@ -0,0 +1,69 @@
+import arcpy
+import numpy as np
+from functools import lru_cache
+
+def project_points(points, in_sr, out_sr, bulk_threshold=10000):
+    """
+    Projects an array of XY coordinates from one spatial reference to another.
+    Small point sets are projected at once as a single multipoint geometry, larger sets are
+    projected in a single Project call on a feature class in the memory workspace.
+
+    Parameters:
+    - points: (N, 2) NumPy array of XY coordinates in the input spatial reference.
+    - in_sr: Spatial reference of the input coordinates.
+    - out_sr: Spatial reference to project the coordinates to.
+    - bulk_threshold: Number of points from which the bulk projection is used.
+
+    Returns:
+    - (N, 2) NumPy array of projected XY coordinates.
+    """
+    if len(points) == 0:
+        return np.empty((0, 2))
+
+    if len(points) < bulk_threshold:
+        # Project all points in one call as the vertices of a multipoint geometry
+        multipoint = arcpy.Multipoint(arcpy.Array([arcpy.Point(*point) for point in points]), in_sr).projectAs(out_sr)
+        return np.array([(pt.X, pt.Y) for pt in multipoint.getPart()], dtype=float)
+
+    # Write the points to the memory workspace, keeping their position in a point ID field
+    point_array = np.empty(len(points), dtype=[("PID", "<i4"), ("X", "<f8"), ("Y", "<f8")])
+    point_array["PID"] = np.arange(len(points))
+    point_array["X"] = points[:, 0]
+    point_array["Y"] = points[:, 1]
+    arcpy.da.NumPyArrayToFeatureClass(point_array, "memory\\points", ("X", "Y"), in_sr)
+
+    # Project all points at once and read them back in their original order
+    arcpy.management.Project("memory\\points", "memory\\points_projected", out_sr)
+    projected = arcpy.da.FeatureClassToNumPyArray("memory\\points_projected", ["PID", "SHAPE@X", "SHAPE@Y"])
+    projected = projected[np.argsort(projected["PID"])]
+    arcpy.management.Delete("memory\\points")
+    arcpy.management.Delete("memory\\points_projected")
+
+    return np.column_stack((projected["SHAPE@X"], projected["SHAPE@Y"]))
+
+def get_utm_wkid(lon, lat):
+    """
+    Determines the WKID of the WGS 1984 UTM zone containing a coordinate.
+
+    Parameters:
+    - lon: Longitude of the coordinate in decimal degrees.
+    - lat: Latitude of the coordinate in decimal degrees.
+
+    Returns:
+    - WKID of the northern (326xx) or southern (327xx) UTM zone.
+    """
+    zone = int((lon + 180) // 6) + 1
+    return (32600 if lat >= 0 else 32700) + zone
+
+@lru_cache(maxsize=None)
+def get_spatial_reference(wkid):
+    """
+    Returns the spatial reference for a WKID, reusing the object created for earlier calls with the same WKID.
+
+    Parameters:
+    - wkid: Well-known ID of the spatial reference.
+
+    Returns:
+    - arcpy.SpatialReference object.
+    """
+    return arcpy.SpatialReference(wkid)
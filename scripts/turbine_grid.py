@@ -0,0 +1,70 @@
+import numpy as np
+from scripts.polygon_rings import points_in_polygons
+
+def get_minimum_rectangle_angle(vertices):
+    """
+    Determines the orientation of the minimum-area bounding rectangle of a set of vertices.
+    The rectangle always has a side parallel to a polygon edge, so only edge directions are tested.
+
+    Parameters:
+    - vertices: (K, 2) NumPy array of XY coordinates.
+
+    Returns:
+    - Rotation angle of the rectangle in radians, between 0 and pi/2.
+    """
+    # Candidate angles from the edge directions, rounded to 0.1 degree to limit their number
+    step = np.deg2rad(0.1)
+    edges = np.diff(vertices, axis=0)
+    angles = np.unique(np.round(np.mod(np.arctan2(edges[:, 1], edges[:, 0]), np.pi / 2) / step) * step)
+    if len(angles) == 0:
+        return 0.0
+
+    # Rotate the vertices by every candidate angle at once and pick the one with the smallest bounding box
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    x = cos * vertices[:, 0] + sin * vertices[:, 1]
+    y = -sin * vertices[:, 0] + cos * vertices[:, 1]
+    areas = (x.max(axis=1) - x.min(axis=1)) * (y.max(axis=1) - y.min(axis=1))
+    return angles[np.argmin(areas)]
+
+def generate_turbine_points(rings, spacing):
+    """
+    Generates a regular grid of turbine points within a polygon. The grid is aligned with the minimum-area
+    bounding rectangle of the polygon, so fewer candidates fall outside elongated or rotated polygons.
+    Only uses NumPy and Numba, so it can run in a worker process.
+
+    Parameters:
+    - rings: List of (K, 2) NumPy arrays with the rings of the polygon, in meters.
+    - spacing: Spacing between the turbines, in meters.
+
+    Returns:
+    - (M, 2) NumPy array of the XY coordinates within the polygon.
+    """
+    if not rings:
+        return np.empty((0, 2))
+
+    # Rotate the vertices into the frame of the minimum-area bounding rectangle
+    vertices = np.vstack(rings)
+    angle = get_minimum_rectangle_angle(vertices)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    local_vertices = vertices @ rotation
+
+    # Determine the extent of the polygon in the rotated frame
+    x_min, y_min = local_vertices.min(axis=0)
+    x_max, y_max = local_vertices.max(axis=0)
+
+    # Calculate number of points in x and y directions
+    num_points_x = int(((x_max - x_min) / spacing) + 1)
+    num_points_y = int(((y_max - y_min) / spacing) + 1)
+
+    # Generate points within the extent directly
+    x_coords = np.linspace(x_min, x_max, num_points_x)
+    y_coords = np.linspace(y_min, y_max, num_points_y)
+
+    # Create grid of x and y coordinates using meshgrid
+    xx, yy = np.meshgrid(x_coords, y_coords)
+
+    # Flatten the grid to create a 2D array of points and rotate it back to the original frame
+    points = np.column_stack((xx.flatten(), yy.flatten())) @ rotation.T
+
+    # Keep the points within the feature using a single vectorized containment test
+    return points[points_in_polygons(points, [rings])]